@@ -0,0 +1,45 @@
+"""
+Persistencia del diagnóstico de un módulo de capacitación.
+
+El resultado y el progreso se guardan con INSERT ... ON CONFLICT DO UPDATE
+sobre sus restricciones únicas (usuario, modulo), dentro de una misma
+transacción: dos envíos simultáneos del mismo usuario no pueden chocar con
+la restricción y el último en confirmar es el que queda.
+"""
+from django.db import transaction
+
+from .models import ProgresoUsuario, ResultadoDiagnostico
+
+MINIMO_APROBACION = 3
+
+
+def calificar(preguntas, respuestas):
+    """Cantidad de respuestas correctas; ``respuestas`` es el POST del formulario"""
+    return sum(
+        1 for pregunta in preguntas
+        if respuestas.get(f'pregunta_{pregunta.id}') == pregunta.respuesta_correcta
+    )
+
+
+def registrar_diagnostico(usuario, modulo, puntaje):
+    """Guarda el resultado y actualiza el progreso del usuario en el módulo"""
+    necesita_refuerzo = puntaje < MINIMO_APROBACION
+    estado = 'pendiente' if necesita_refuerzo else 'completado'
+
+    with transaction.atomic():
+        ResultadoDiagnostico.objects.bulk_create(
+            [ResultadoDiagnostico(
+                usuario=usuario, modulo=modulo,
+                puntaje=puntaje, necesita_refuerzo=necesita_refuerzo
+            )],
+            update_conflicts=True,
+            unique_fields=['usuario', 'modulo'],
+            update_fields=['puntaje', 'necesita_refuerzo'],
+        )
+        ProgresoUsuario.objects.bulk_create(
+            [ProgresoUsuario(usuario=usuario, modulo=modulo, estado=estado)],
+            update_conflicts=True,
+            unique_fields=['usuario', 'modulo'],
+            update_fields=['estado'],
+        )
+    return necesita_refuerzo
@@ -1,3 +1,102 @@
-from django.test import TestCase
+import threading
+import unittest
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Modulo, ProgresoUsuario, ResultadoDiagnostico
+from .services import registrar_diagnostico
+
+
+def crear_modulo():
+    return Modulo.objects.create(
+        titulo='Hojas de cálculo', descripcion='', nivel='basico', duracion_estimada=30
+    )
+
+
+class RegistrarDiagnosticoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        cls.modulo = crear_modulo()
+
+    def test_reenvio_actualiza_la_misma_fila(self):
+        registrar_diagnostico(self.usuario, self.modulo, 1)
+        registrar_diagnostico(self.usuario, self.modulo, 4)
+
+        resultado = ResultadoDiagnostico.objects.get()
+        self.assertEqual((resultado.puntaje, resultado.necesita_refuerzo), (4, False))
+        self.assertEqual(ProgresoUsuario.objects.get().estado, 'completado')
+
+    def test_sin_lecturas_previas(self):
+        # SAVEPOINT + dos upserts + RELEASE
+        with self.assertNumQueries(4):
+            registrar_diagnostico(self.usuario, self.modulo, 2)
+
+    def test_fila_insertada_justo_antes_del_upsert(self):
+        # Reproduce la carrera de la prueba concurrente en cualquier backend:
+        # otra petición inserta las filas entre el inicio de la transacción y
+        # cada INSERT, que debe resolverse con ON CONFLICT DO UPDATE
+        otras = {}
+
+        def insertar_antes(execute, sql, params, many, context):
+            if sql.startswith('INSERT') and not otras.get('insertando'):
+                otras['insertando'] = True
+                try:
+                    if 'capacitacion_resultadodiagnostico' in sql:
+                        otras['resultado'] = ResultadoDiagnostico.objects.create(
+                            usuario=self.usuario, modulo=self.modulo, puntaje=0
+                        )
+                    else:
+                        otras['progreso'] = ProgresoUsuario.objects.create(
+                            usuario=self.usuario, modulo=self.modulo,
+                            estado='en_curso', fecha_inicio=timezone.now()
+                        )
+                finally:
+                    otras['insertando'] = False
+                self.assertIn('ON CONFLICT', sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(insertar_antes):
+            self.assertFalse(registrar_diagnostico(self.usuario, self.modulo, 4))
+
+        resultado = ResultadoDiagnostico.objects.get()
+        self.assertEqual(resultado.id, otras['resultado'].id)
+        self.assertEqual((resultado.puntaje, resultado.necesita_refuerzo), (4, False))
+        progreso = ProgresoUsuario.objects.get()
+        self.assertEqual(progreso.id, otras['progreso'].id)
+        self.assertEqual(progreso.estado, 'completado')
+        # Solo se actualizan los campos de update_fields
+        self.assertEqual(progreso.fecha_inicio, otras['progreso'].fecha_inicio)
+
+
+@unittest.skipIf(connection.vendor == 'sqlite', 'SQLite en memoria no admite escrituras concurrentes')
+class RegistrarDiagnosticoConcurrenteTests(TransactionTestCase):
+    HILOS = 8
+
+    def test_envios_simultaneos(self):
+        usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        modulo = crear_modulo()
+        barrera = threading.Barrier(self.HILOS)
+        errores = []
+
+        def enviar(puntaje):
+            try:
+                barrera.wait()
+                registrar_diagnostico(usuario, modulo, puntaje)
+            except Exception as error:
+                errores.append(error)
+            finally:
+                connection.close()
+
+        hilos = [threading.Thread(target=enviar, args=(i % 5,)) for i in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(errores, [])
+        self.assertEqual(ResultadoDiagnostico.objects.count(), 1)
+        self.assertEqual(ProgresoUsuario.objects.count(), 1)
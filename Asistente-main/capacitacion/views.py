@@ -1,8 +1,11 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from .models import Modulo, ProgresoUsuario, ResultadoDiagnostico
+from plataforma_adaptativa.routers import usar_replica
+from .models import Modulo, ProgresoUsuario
+from .services import calificar, registrar_diagnostico
 
 @login_required
+@usar_replica
 def dashboard(request):
     progresos = ProgresoUsuario.objects.filter(usuario=request.user)
     return render(request, 'capacitacion/dashboard.html', {'progresos': progresos})
@@ -13,33 +16,9 @@ def diagnostico_modulo(request, modulo_id):
     preguntas = modulo.preguntadiagnostico_set.all()
     
     if request.method == 'POST':
-        # Calcular puntaje y determinar si necesita refuerzo
-        puntaje = 0
-        for pregunta in preguntas:
-            respuesta_usuario = request.POST.get(f'pregunta_{pregunta.id}')
-            if respuesta_usuario == pregunta.respuesta_correcta:
-                puntaje += 1
-        
-        necesita_refuerzo = puntaje < 3  # Si responde menos de 3 bien
-        
-        # Guardar resultado
-        resultado, created = ResultadoDiagnostico.objects.update_or_create(
-            usuario=request.user,
-            modulo=modulo,
-            defaults={'puntaje': puntaje, 'necesita_refuerzo': necesita_refuerzo}
-        )
-        
-        # Actualizar progreso
-        if necesita_refuerzo:
-            estado = 'pendiente'
-        else:
-            estado = 'completado'
-            
-        ProgresoUsuario.objects.update_or_create(
-            usuario=request.user,
-            modulo=modulo,
-            defaults={'estado': estado}
-        )
+        # Calcular puntaje y guardar resultado y progreso en una sola transacción
+        puntaje = calificar(preguntas, request.POST)
+        registrar_diagnostico(request.user, modulo, puntaje)
         
         return redirect('dashboard')
     
@@ -5,7 +5,13 @@ from .models import Modulo, Pregunta, OpcionRespuesta, DiagnosticoUsuario, Respu
 admin.site.register(Modulo)
 admin.site.register(Pregunta)
 admin.site.register(OpcionRespuesta)
-admin.site.register(DiagnosticoUsuario)
+
+@admin.register(DiagnosticoUsuario)
+class DiagnosticoUsuarioAdmin(admin.ModelAdmin):
+	list_display = ['usuario', 'completado', 'fecha_finalizacion', 'puntuacion_total', 'porcentaje', 'nivel_recomendacion']
+	list_filter = ['completado', 'nivel_recomendacion']
+	list_select_related = ['usuario']
+
 admin.site.register(RespuestaUsuario)
 
 def crear_preguntas_ejemplo():
@@ -7,7 +7,7 @@ class DiagnosticoConfig(AppConfig):
     name = 'diagnostico'
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
 
     @transaction.atomic
     def crear_datos_iniciales(self):
@@ -0,0 +1,86 @@
+"""
+Cuestionario del diagnóstico servido desde la base de datos.
+
+Las preguntas y opciones de un ``Modulo`` se leen con una consulta más un
+``prefetch_related`` y se guardan serializadas en la caché de Django, bajo el
+espacio versionado de ese módulo (ver plataforma_adaptativa.cache). Las
+señales invalidan el espacio cuando se edita una pregunta, una opción o el
+propio módulo (ver signals.py).
+"""
+from django.core.cache import cache
+from django.db.models import Prefetch
+
+from plataforma_adaptativa.cache import (
+    clave_versionada, construir_clave, espacio_modelo, invalidar, obtener_o_calcular,
+)
+
+from .models import Modulo, OpcionRespuesta, Pregunta
+
+NOMBRE_MODULO_DIAGNOSTICO = 'Competencias Digitales'
+CLAVE_MODULO = construir_clave('diagnostico', 'modulo_diagnostico')
+
+
+def serializar_cuestionario(modulo_id):
+    """Estructura del cuestionario lista para la plantilla y para calificar"""
+    preguntas = (
+        Pregunta.objects.filter(modulo_id=modulo_id)
+        .order_by('orden', 'id')
+        .prefetch_related(Prefetch(
+            'opcionrespuesta_set',
+            queryset=OpcionRespuesta.objects.order_by('valor', 'id'),
+        ))
+    )
+
+    serializadas = []
+    opciones_por_id = {}
+    puntuacion_maxima = 0
+    for pregunta in preguntas:
+        opciones = [
+            {'id': opcion.id, 'texto': opcion.texto, 'valor': opcion.valor}
+            for opcion in pregunta.opcionrespuesta_set.all()
+        ]
+        for opcion in opciones:
+            opciones_por_id[opcion['id']] = dict(opcion, pregunta_id=pregunta.id)
+        if opciones:
+            puntuacion_maxima += max(opcion['valor'] for opcion in opciones)
+        serializadas.append({'id': pregunta.id, 'texto': pregunta.texto, 'opciones': opciones})
+
+    return {
+        'modulo_id': modulo_id,
+        'preguntas': serializadas,
+        'opciones': opciones_por_id,
+        'puntuacion_maxima': puntuacion_maxima,
+    }
+
+
+def obtener_modulo_diagnostico_id():
+    """Id del módulo del diagnóstico, creado por la migración 0006_datos_iniciales"""
+    modulo_id = cache.get(CLAVE_MODULO)
+    if modulo_id is None:
+        modulo_id = (
+            Modulo.objects.filter(nombre=NOMBRE_MODULO_DIAGNOSTICO)
+            .order_by('id').values_list('id', flat=True).first()
+        )
+        if modulo_id is None:
+            raise Modulo.DoesNotExist(
+                "No existe el módulo del diagnóstico; ejecuta 'manage.py migrate' "
+                "o 'manage.py crear_datos_iniciales'"
+            )
+        cache.set(CLAVE_MODULO, modulo_id, None)
+    return modulo_id
+
+
+def obtener_cuestionario(modulo_id=None):
+    """Cuestionario del módulo (por defecto el del diagnóstico), desde la caché si es posible"""
+    if modulo_id is None:
+        modulo_id = obtener_modulo_diagnostico_id()
+    return obtener_o_calcular(
+        clave_versionada(espacio_modelo(Modulo, modulo_id), 'cuestionario'),
+        lambda: serializar_cuestionario(modulo_id),
+        None,
+    )
+
+
+def invalidar_cuestionario(modulo_id):
+    """Marca como obsoleto el cuestionario en caché de un módulo"""
+    invalidar(espacio_modelo(Modulo, modulo_id))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagnostico', '0003_alter_respuestausuario_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diagnosticousuario',
+            name='nivel_recomendacion',
+            field=models.CharField(blank=True, choices=[('basico', 'Básico'), ('intermedio', 'Intermedio'), ('avanzado', 'Avanzado')], max_length=20),
+        ),
+        migrations.AddField(
+            model_name='diagnosticousuario',
+            name='porcentaje',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='diagnosticousuario',
+            name='puntuacion_total',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
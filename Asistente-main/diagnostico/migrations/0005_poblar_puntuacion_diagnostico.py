@@ -0,0 +1,65 @@
+from django.db import migrations, transaction
+from django.db.models import Max, Sum
+
+TAMANO_LOTE = 500
+
+
+def nivel_para(porcentaje):
+    # Mismos umbrales que diagnostico.recomendaciones.nivel_para
+    if porcentaje < 40:
+        return 'basico'
+    if porcentaje < 70:
+        return 'intermedio'
+    return 'avanzado'
+
+
+def poblar_puntuaciones(apps, schema_editor):
+    Pregunta = apps.get_model('diagnostico', 'Pregunta')
+    DiagnosticoUsuario = apps.get_model('diagnostico', 'DiagnosticoUsuario')
+    RespuestaUsuario = apps.get_model('diagnostico', 'RespuestaUsuario')
+
+    maximos = (
+        Pregunta.objects.filter(modulo__nombre='Competencias Digitales')
+        .annotate(maximo=Max('opcionrespuesta__valor'))
+        .values_list('maximo', flat=True)
+    )
+    puntuacion_maxima = sum(valor or 0 for valor in maximos) or 25
+
+    pendientes = DiagnosticoUsuario.objects.filter(
+        completado=True, puntuacion_total__isnull=True
+    ).order_by('id')
+    ultimo_id = 0
+    while True:
+        lote = list(pendientes.filter(id__gt=ultimo_id)[:TAMANO_LOTE])
+        if not lote:
+            break
+        ultimo_id = lote[-1].id
+
+        sumas = dict(
+            RespuestaUsuario.objects.filter(diagnostico__in=lote)
+            .values('diagnostico_id')
+            .annotate(total=Sum('opcion_seleccionada__valor'))
+            .order_by()
+            .values_list('diagnostico_id', 'total')
+        )
+        for diagnostico in lote:
+            diagnostico.puntuacion_total = sumas.get(diagnostico.id) or 0
+            diagnostico.porcentaje = diagnostico.puntuacion_total / puntuacion_maxima * 100
+            diagnostico.nivel_recomendacion = nivel_para(diagnostico.porcentaje)
+        with transaction.atomic():
+            DiagnosticoUsuario.objects.bulk_update(
+                lote, ['puntuacion_total', 'porcentaje', 'nivel_recomendacion']
+            )
+
+
+class Migration(migrations.Migration):
+    # Cada lote se confirma por separado para no bloquear la tabla entera
+    atomic = False
+
+    dependencies = [
+        ('diagnostico', '0004_diagnosticousuario_puntuacion'),
+    ]
+
+    operations = [
+        migrations.RunPython(poblar_puntuaciones, migrations.RunPython.noop),
+    ]
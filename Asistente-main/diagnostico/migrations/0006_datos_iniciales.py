@@ -0,0 +1,52 @@
+from django.core.management.color import no_style
+from django.db import migrations
+
+NOMBRE_MODULO = 'Competencias Digitales'
+
+# Mismos datos que DiagnosticoConfig.crear_datos_iniciales(); cada pregunta
+# tiene cinco opciones con ids consecutivos (1-5, 6-10, ...)
+PREGUNTAS = [
+    '¿Con qué frecuencia usas herramientas ofimáticas (Word, Excel, etc.)?',
+    '¿Te sientes cómodo navegando y buscando información en Internet?',
+    '¿Has utilizado plataformas de aprendizaje en línea?',
+    '¿Sabes cómo proteger tus datos personales en la web?',
+    '¿Puedes identificar noticias falsas o desinformación en redes sociales?',
+]
+OPCIONES = ['Nunca', 'Rara vez', 'A veces', 'Frecuentemente', 'Siempre']
+
+
+def crear_datos_iniciales(apps, schema_editor):
+    Modulo = apps.get_model('diagnostico', 'Modulo')
+    Pregunta = apps.get_model('diagnostico', 'Pregunta')
+    OpcionRespuesta = apps.get_model('diagnostico', 'OpcionRespuesta')
+
+    modulo, _ = Modulo.objects.get_or_create(
+        nombre=NOMBRE_MODULO,
+        defaults={'descripcion': 'Diagnóstico de competencias digitales básicas'}
+    )
+    for numero, texto in enumerate(PREGUNTAS, start=1):
+        Pregunta.objects.get_or_create(
+            id=numero, defaults={'modulo': modulo, 'texto': texto, 'orden': numero}
+        )
+        for valor, opcion in enumerate(OPCIONES, start=1):
+            OpcionRespuesta.objects.get_or_create(
+                id=(numero - 1) * len(OPCIONES) + valor,
+                defaults={'pregunta_id': numero, 'texto': opcion, 'valor': valor}
+            )
+
+    # Los ids se insertaron a mano: en PostgreSQL las secuencias deben avanzar
+    conexion = schema_editor.connection
+    with conexion.cursor() as cursor:
+        for sql in conexion.ops.sequence_reset_sql(no_style(), [Pregunta, OpcionRespuesta]):
+            cursor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('diagnostico', '0005_poblar_puntuacion_diagnostico'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_datos_iniciales, migrations.RunPython.noop),
+    ]
@@ -26,10 +26,20 @@ class OpcionRespuesta(models.Model):
         return self.texto
 
 class DiagnosticoUsuario(models.Model):
+    NIVEL_CHOICES = [
+        ('basico', 'Básico'),
+        ('intermedio', 'Intermedio'),
+        ('avanzado', 'Avanzado'),
+    ]
+
     usuario = models.ForeignKey(User, on_delete=models.CASCADE)
     fecha_inicio = models.DateTimeField(auto_now_add=True)
     fecha_finalizacion = models.DateTimeField(null=True, blank=True)
     completado = models.BooleanField(default=False)
+    # Se guardan al completar el diagnóstico para no recalcularlos en cada lectura
+    puntuacion_total = models.IntegerField(null=True, blank=True)
+    porcentaje = models.FloatField(null=True, blank=True)
+    nivel_recomendacion = models.CharField(max_length=20, choices=NIVEL_CHOICES, blank=True)
 
     class Meta:
         db_table = 'diagnostico_diagnostico'
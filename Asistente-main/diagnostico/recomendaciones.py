@@ -0,0 +1,82 @@
+"""
+Recomendaciones de módulos a partir de un diagnóstico completado.
+
+Un diagnóstico completado no cambia, así que su puntuación y los módulos
+recomendados se calculan una vez (la suma se hace en SQL) y se guardan en la
+caché por id de diagnóstico y versión del catálogo de módulos.
+"""
+from django.db.models import Sum
+
+from modulos.catalogo import obtener_catalogo, version_catalogo
+from plataforma_adaptativa.cache import construir_clave, obtener_o_calcular
+
+from .cuestionario import obtener_cuestionario
+from .models import DiagnosticoUsuario, RespuestaUsuario
+
+NIVEL_BASICO = 'basico'
+NIVEL_INTERMEDIO = 'intermedio'
+NIVEL_AVANZADO = 'avanzado'
+
+
+def nivel_para(porcentaje):
+    """Nivel de recomendación según el porcentaje obtenido"""
+    if porcentaje < 40:
+        return NIVEL_BASICO
+    if porcentaje < 70:
+        return NIVEL_INTERMEDIO
+    return NIVEL_AVANZADO
+
+
+def seleccionar_modulos(modulos, nivel):
+    """Porción de la lista ordenada de módulos que corresponde al nivel"""
+    if nivel == NIVEL_BASICO:
+        # Primeros módulos disponibles
+        return modulos[:3]
+    if nivel == NIVEL_INTERMEDIO:
+        # Módulos intermedios
+        inicio = max(0, len(modulos) // 2 - 1)
+        return modulos[inicio:inicio + 3]
+    # Módulos avanzados
+    return modulos[len(modulos) // 2:]
+
+
+def ultimo_diagnostico_completado(usuario):
+    return DiagnosticoUsuario.objects.filter(
+        usuario=usuario,
+        completado=True
+    ).order_by('-fecha_finalizacion').first()
+
+
+def calcular_recomendacion(diagnostico):
+    """Puntuación del diagnóstico y módulos recomendados, sin pasar por la caché"""
+    puntuacion_maxima = obtener_cuestionario()['puntuacion_maxima']
+    if diagnostico.puntuacion_total is not None:
+        # Guardada al completar el diagnóstico
+        puntuacion_total = diagnostico.puntuacion_total
+        porcentaje = diagnostico.porcentaje
+        nivel = diagnostico.nivel_recomendacion or nivel_para(porcentaje)
+    else:
+        puntuacion_total = RespuestaUsuario.objects.filter(diagnostico=diagnostico).aggregate(
+            total=Sum('opcion_seleccionada__valor')
+        )['total'] or 0
+        porcentaje = (puntuacion_total / puntuacion_maxima) * 100 if puntuacion_maxima else 0
+        nivel = nivel_para(porcentaje)
+
+    seleccion = seleccionar_modulos(obtener_catalogo().modulos, nivel)
+    return {
+        'diagnostico_id': diagnostico.id,
+        'puntuacion_total': puntuacion_total,
+        'puntuacion_maxima': puntuacion_maxima,
+        'porcentaje': porcentaje,
+        'nivel': nivel,
+        'modulos': [modulo.id for modulo in seleccion],
+        'titulos': [modulo.titulo for modulo in seleccion],
+    }
+
+
+def obtener_recomendacion(diagnostico):
+    """Recomendación de un diagnóstico completado, en caché por versión del catálogo"""
+    # Cada cambio del catálogo deja huérfanas las entradas anteriores, así que
+    # deben expirar solas (TIMEOUT de la caché) en lugar de durar para siempre
+    clave = construir_clave('diagnostico', 'recomendacion', diagnostico.id, f'c{version_catalogo()}')
+    return obtener_o_calcular(clave, lambda: calcular_recomendacion(diagnostico))
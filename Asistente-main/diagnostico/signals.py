@@ -0,0 +1,39 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cuestionario import CLAVE_MODULO, invalidar_cuestionario
+from .models import Modulo, OpcionRespuesta, Pregunta
+
+
+# La invalidación espera al commit: si se hiciera antes, una lectura
+# concurrente podría guardar en la nueva versión las filas aún sin confirmar
+
+
+@receiver([post_save, post_delete], sender=Modulo)
+def modulo_modificado(sender, instance, **kwargs):
+    pk = instance.pk
+
+    def invalidar_modulo():
+        cache.delete(CLAVE_MODULO)
+        invalidar_cuestionario(pk)
+
+    transaction.on_commit(invalidar_modulo)
+
+
+@receiver([post_save, post_delete], sender=Pregunta)
+def pregunta_modificada(sender, instance, **kwargs):
+    modulo_id = instance.modulo_id
+    transaction.on_commit(lambda: invalidar_cuestionario(modulo_id))
+
+
+@receiver([post_save, post_delete], sender=OpcionRespuesta)
+def opcion_modificada(sender, instance, **kwargs):
+    modulo_id = (
+        Pregunta.objects.filter(id=instance.pregunta_id)
+        .values_list('modulo_id', flat=True).first()
+    )
+    # Si la pregunta ya no existe, su propia eliminación invalida el cuestionario
+    if modulo_id is not None:
+        transaction.on_commit(lambda: invalidar_cuestionario(modulo_id))
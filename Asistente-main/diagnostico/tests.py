@@ -1,3 +1,179 @@
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from modulos.catalogo import descartar_catalogo, obtener_catalogo
+from modulos.models import ModuloEstudio, ProgresoUsuario
+from plataforma_adaptativa.routers import COOKIE_PRIMARIA
+
+from .cuestionario import obtener_cuestionario
+from .models import DiagnosticoUsuario, OpcionRespuesta, Pregunta, RespuestaUsuario
+from .recomendaciones import obtener_recomendacion
+
+
+class IniciarDiagnosticoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        apps.get_app_config('diagnostico').crear_datos_iniciales()
+        cls.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.usuario)
+        # Diagnóstico pendiente creado por la visita previa al cuestionario
+        DiagnosticoUsuario.objects.create(usuario=self.usuario)
+
+    def respuestas(self, cantidad):
+        return {
+            f'pregunta_{pregunta["id"]}': pregunta['opciones'][-1]['id']
+            for pregunta in obtener_cuestionario()['preguntas'][:cantidad]
+        }
+
+    def test_envio_guarda_todas_las_respuestas(self):
+        self.client.post(reverse('diagnostico:iniciar_diagnostico'), self.respuestas(5))
+
+        diagnostico = DiagnosticoUsuario.objects.get(usuario=self.usuario)
+        self.assertTrue(diagnostico.completado)
+        self.assertEqual(diagnostico.puntuacion_total, 25)
+        self.assertEqual(diagnostico.porcentaje, 100)
+        self.assertEqual(diagnostico.nivel_recomendacion, 'avanzado')
+        self.assertEqual(
+            sorted(RespuestaUsuario.objects.values_list('pregunta_id', flat=True)),
+            sorted(Pregunta.objects.values_list('id', flat=True)),
+        )
+
+    def test_consultas_constantes_sin_importar_cantidad_de_respuestas(self):
+        url = reverse('diagnostico:iniciar_diagnostico')
+        respuestas = self.respuestas(5)
+        # sesión + usuario + diagnóstico pendiente + SAVEPOINT/RELEASE
+        # + bulk_create + UPDATE del diagnóstico; el cuestionario sale de la caché
+        with self.assertNumQueries(7):
+            self.client.post(url, respuestas)
+
+        DiagnosticoUsuario.objects.create(usuario=self.usuario)
+        with self.assertNumQueries(7):
+            self.client.post(url, self.respuestas(2))
+
+
+class CuestionarioTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        apps.get_app_config('diagnostico').crear_datos_iniciales()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_estructura_desde_la_base(self):
+        cuestionario = obtener_cuestionario()
+        self.assertEqual(len(cuestionario['preguntas']), Pregunta.objects.count())
+        self.assertEqual(len(cuestionario['opciones']), OpcionRespuesta.objects.count())
+        self.assertEqual(cuestionario['puntuacion_maxima'], 25)
+
+    def test_segunda_lectura_sale_de_la_cache(self):
+        obtener_cuestionario()
+        with self.assertNumQueries(0):
+            obtener_cuestionario()
+
+    def test_editar_pregunta_invalida_la_cache(self):
+        obtener_cuestionario()
+        pregunta = Pregunta.objects.order_by('orden').first()
+        pregunta.texto = 'Texto actualizado'
+        with self.captureOnCommitCallbacks(execute=True):
+            pregunta.save()
+            # Hasta el commit se sigue sirviendo la versión anterior
+            self.assertNotEqual(obtener_cuestionario()['preguntas'][0]['texto'], 'Texto actualizado')
+
+        self.assertEqual(obtener_cuestionario()['preguntas'][0]['texto'], 'Texto actualizado')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            OpcionRespuesta.objects.create(pregunta=pregunta, texto='Experto', valor=7)
+        self.assertEqual(obtener_cuestionario()['puntuacion_maxima'], 27)
+
+    def test_datos_iniciales_creados_por_la_migracion(self):
+        self.assertEqual(Pregunta.objects.filter(modulo__nombre='Competencias Digitales').count(), 5)
+        self.assertEqual(OpcionRespuesta.objects.count(), 25)
+
+
+class DashboardProgresoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        otro = User.objects.create_user('otro', password='clave-segura-123')
+        for orden in range(1, 21):
+            modulo = ModuloEstudio.objects.create(
+                titulo=f'Módulo {orden}', descripcion='', orden=orden, duracion_estimada=30
+            )
+            if orden <= 3:
+                ProgresoUsuario.objects.create(usuario=cls.usuario, modulo=modulo, completado=orden <= 2)
+            ProgresoUsuario.objects.create(usuario=otro, modulo=modulo, completado=True)
+
+    def setUp(self):
+        descartar_catalogo()
+        self.client.force_login(self.usuario)
+
+    def test_una_sola_consulta_para_la_tabla(self):
+        obtener_catalogo()
+        # Leer de la principal aunque haya réplica configurada, para contar todo en 'default'
+        self.client.cookies[COOKIE_PRIMARIA] = '1'
+        # sesión + usuario + progreso + resumen; los módulos salen del catálogo en memoria
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(reverse('diagnostico:dashboard_progreso'))
+
+        self.assertEqual(respuesta.context['total_modulos'], 20)
+        self.assertEqual(respuesta.context['modulos_completados'], 2)
+        self.assertEqual(respuesta.context['modulos_comenzados'], 3)
+        self.assertEqual(respuesta.context['tiempo_completado'], 60)
+        estados = [dato['estado'] for dato in respuesta.context['datos_modulos'][:4]]
+        self.assertEqual(estados, ['Completado', 'Completado', 'En progreso', 'No iniciado'])
+
+
+class RecomendacionesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        apps.get_app_config('diagnostico').crear_datos_iniciales()
+        apps.get_app_config('modulos').crear_modulos_iniciales()
+        cls.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+
+    def setUp(self):
+        cache.clear()
+        descartar_catalogo()
+
+    def completar(self, indice_opcion):
+        diagnostico = DiagnosticoUsuario.objects.create(usuario=self.usuario, completado=True)
+        RespuestaUsuario.objects.bulk_create(
+            RespuestaUsuario(
+                diagnostico=diagnostico,
+                pregunta_id=pregunta['id'],
+                opcion_seleccionada_id=pregunta['opciones'][indice_opcion]['id'],
+            )
+            for pregunta in obtener_cuestionario()['preguntas']
+        )
+        return diagnostico
+
+    def test_puntuacion_y_nivel(self):
+        recomendacion = obtener_recomendacion(self.completar(0))
+        self.assertEqual(recomendacion['puntuacion_total'], 5)
+        self.assertEqual(recomendacion['nivel'], 'basico')
+        self.assertEqual(len(recomendacion['modulos']), 3)
+
+        recomendacion = obtener_recomendacion(self.completar(-1))
+        self.assertEqual(recomendacion['porcentaje'], 100)
+        self.assertEqual(recomendacion['nivel'], 'avanzado')
+
+    def test_se_calcula_una_vez_por_diagnostico(self):
+        diagnostico = self.completar(2)
+        obtener_recomendacion(diagnostico)
+        with self.assertNumQueries(0):
+            obtener_recomendacion(diagnostico)
+
+    def test_cambio_de_catalogo_recalcula(self):
+        diagnostico = self.completar(0)
+        primero = ModuloEstudio.objects.get(orden=1)
+        self.assertIn(primero.id, obtener_recomendacion(diagnostico)['modulos'])
+
+        primero.activo = False
+        with self.captureOnCommitCallbacks(execute=True):
+            primero.save()
+        self.assertNotIn(primero.id, obtener_recomendacion(diagnostico)['modulos'])
@@ -5,12 +5,16 @@ from django.contrib import messages
 from django.db import transaction
 from django.utils import timezone
 from .models import Modulo, Pregunta, DiagnosticoUsuario, RespuestaUsuario, OpcionRespuesta
+from .cuestionario import obtener_cuestionario
 from .forms import DiagnosticoForm
-from modulos.models import ModuloEstudio, ProgresoUsuario
+from .recomendaciones import nivel_para, obtener_recomendacion, ultimo_diagnostico_completado
+from modulos.catalogo import obtener_catalogo
+from modulos.models import ProgresoUsuario
+from modulos.resumen import obtener_resumen
+from plataforma_adaptativa.routers import usar_replica
 import json
 
 @login_required
-@transaction.atomic
 def iniciar_diagnostico(request):
     """
     Vista para iniciar el diagnóstico del usuario.
@@ -27,107 +31,48 @@ def iniciar_diagnostico(request):
                 completado=False,
                 fecha_inicio=timezone.now()
             )
-        
-        preguntas_fijas = [
-            {
-                'id': 1,
-                'texto': '¿Con qué frecuencia usas herramientas ofimáticas (Word, Excel, etc.)?',
-                'opciones': [
-                    {'id': 1, 'texto': 'Nunca', 'valor': 1},
-                    {'id': 2, 'texto': 'Rara vez', 'valor': 2},
-                    {'id': 3, 'texto': 'A veces', 'valor': 3},
-                    {'id': 4, 'texto': 'Frecuentemente', 'valor': 4},
-                    {'id': 5, 'texto': 'Siempre', 'valor': 5}
-                ]
-            },
-            {
-                'id': 2,
-                'texto': '¿Te sientes cómodo navegando y buscando información en Internet?',
-                'opciones': [
-                    {'id': 6, 'texto': 'Nunca', 'valor': 1},
-                    {'id': 7, 'texto': 'Rara vez', 'valor': 2},
-                    {'id': 8, 'texto': 'A veces', 'valor': 3},
-                    {'id': 9, 'texto': 'Frecuentemente', 'valor': 4},
-                    {'id': 10, 'texto': 'Siempre', 'valor': 5}
-                ]
-            },
-            {
-                'id': 3,
-                'texto': '¿Has utilizado plataformas de aprendizaje en línea?',
-                'opciones': [
-                    {'id': 11, 'texto': 'Nunca', 'valor': 1},
-                    {'id': 12, 'texto': 'Rara vez', 'valor': 2},
-                    {'id': 13, 'texto': 'A veces', 'valor': 3},
-                    {'id': 14, 'texto': 'Frecuentemente', 'valor': 4},
-                    {'id': 15, 'texto': 'Siempre', 'valor': 5}
-                ]
-            },
-            {
-                'id': 4,
-                'texto': '¿Sabes cómo proteger tus datos personales en la web?',
-                'opciones': [
-                    {'id': 16, 'texto': 'Nunca', 'valor': 1},
-                    {'id': 17, 'texto': 'Rara vez', 'valor': 2},
-                    {'id': 18, 'texto': 'A veces', 'valor': 3},
-                    {'id': 19, 'texto': 'Frecuentemente', 'valor': 4},
-                    {'id': 20, 'texto': 'Siempre', 'valor': 5}
-                ]
-            },
-            {
-                'id': 5,
-                'texto': '¿Puedes identificar noticias falsas o desinformación en redes sociales?',
-                'opciones': [
-                    {'id': 21, 'texto': 'Nunca', 'valor': 1},
-                    {'id': 22, 'texto': 'Rara vez', 'valor': 2},
-                    {'id': 23, 'texto': 'A veces', 'valor': 3},
-                    {'id': 24, 'texto': 'Frecuentemente', 'valor': 4},
-                    {'id': 25, 'texto': 'Siempre', 'valor': 5}
-                ]
-            }
-        ]
+
+        cuestionario = obtener_cuestionario()
 
         if request.method == 'POST':
-            # Calcular puntuación total y guardar respuestas
+            # Calcular puntuación total con el mapa de opciones del cuestionario
             puntuacion_total = 0
-            respuestas_guardadas = []
-            for pregunta in preguntas_fijas:
-                respuesta_id = request.POST.get(f'pregunta_{pregunta["id"]}')
-                if respuesta_id:
-                    for opcion in pregunta['opciones']:
-                        if str(opcion['id']) == respuesta_id:
-                            puntuacion_total += opcion['valor']
-                            opcion_obj = OpcionRespuesta.objects.get_or_create(
-                                id=opcion['id'],
-                                defaults={
-                                    'texto': opcion['texto'],
-                                    'valor': opcion['valor'],
-                                    'pregunta_id': pregunta['id']  
-                                }
-                            )[0]
-                            respuestas_guardadas.append(opcion_obj)
-                            break
-
-            # Guardar respuestas en la base de datos
-            for i, opcion in enumerate(respuestas_guardadas):
-                RespuestaUsuario.objects.create(
-                    diagnostico=diagnostico,
-                    pregunta_id=preguntas_fijas[i]['id'],
-                    opcion_seleccionada=opcion
-                )
-
-            # Marcar diagnóstico como completado
-            diagnostico.completado = True
-            diagnostico.fecha_finalizacion = timezone.now()
-            diagnostico.save()
-
-            # Calcular porcentaje (máximo 25 puntos = 5 preguntas × 5 puntos)
-            porcentaje = (puntuacion_total / 25) * 100
+            respuestas = []
+            for pregunta in cuestionario['preguntas']:
+                respuesta_id = request.POST.get(f'pregunta_{pregunta["id"]}', '')
+                opcion = cuestionario['opciones'].get(int(respuesta_id)) if respuesta_id.isdigit() else None
+                if opcion and opcion['pregunta_id'] == pregunta['id']:
+                    puntuacion_total += opcion['valor']
+                    respuestas.append(RespuestaUsuario(
+                        diagnostico=diagnostico,
+                        pregunta_id=pregunta['id'],
+                        opcion_seleccionada_id=opcion['id']
+                    ))
+
+            # Calcular porcentaje sobre la puntuación máxima del cuestionario
+            puntuacion_maxima = cuestionario['puntuacion_maxima']
+            porcentaje = (puntuacion_total / puntuacion_maxima) * 100 if puntuacion_maxima else 0
+
+            with transaction.atomic():
+                # Guardar todas las respuestas en un solo INSERT
+                RespuestaUsuario.objects.bulk_create(respuestas)
+
+                # Marcar diagnóstico como completado junto con su puntuación
+                diagnostico.completado = True
+                diagnostico.fecha_finalizacion = timezone.now()
+                diagnostico.puntuacion_total = puntuacion_total
+                diagnostico.porcentaje = porcentaje
+                diagnostico.nivel_recomendacion = nivel_para(porcentaje)
+                diagnostico.save(update_fields=[
+                    'completado', 'fecha_finalizacion',
+                    'puntuacion_total', 'porcentaje', 'nivel_recomendacion'
+                ])
 
             messages.success(request, "¡Diagnóstico completado exitosamente!")
             return redirect('diagnostico:resultado_diagnostico')
         
         return render(request, 'diagnostico/cuestionario.html', {
-            'preguntas': preguntas_fijas
+            'preguntas': cuestionario['preguntas']
         })
     
     except Exception as e:
@@ -135,53 +80,32 @@ def iniciar_diagnostico(request):
         return redirect('/')
 
 @login_required
+@usar_replica
 def resultado_diagnostico(request):
     """
     Vista para mostrar los resultados del diagnóstico completado
     """
     try:
         # Obtener el último diagnóstico completado del usuario
-        diagnostico = DiagnosticoUsuario.objects.filter(
-            usuario=request.user,
-            completado=True
-        ).order_by('-fecha_finalizacion').first()
+        diagnostico = ultimo_diagnostico_completado(request.user)
 
         if not diagnostico:
             messages.warning(request, "No has completado ningún diagnóstico aún.")
             return redirect('diagnostico:iniciar_diagnostico')
 
-        # Calcular puntuación total desde las respuestas guardadas
-        respuestas = RespuestaUsuario.objects.filter(diagnostico=diagnostico).select_related('opcion_seleccionada')
-        puntuacion_total = sum(respuesta.opcion_seleccionada.valor for respuesta in respuestas)
-        puntuacion_maxima = 25  # 5 preguntas, máximo 5 puntos cada una
-        porcentaje = (puntuacion_total / puntuacion_maxima) * 100
-
-        # Generar recomendaciones basadas en la puntuación usando módulos existentes
-        from modulos.models import ModuloEstudio
-        modulos = ModuloEstudio.objects.filter(activo=True).order_by('orden')
+        respuestas = RespuestaUsuario.objects.filter(diagnostico=diagnostico).select_related('pregunta', 'opcion_seleccionada')
 
-        recomendaciones = []
-        if modulos.exists():
-            if porcentaje < 40:
-                # Recomendar primeros módulos disponibles
-                recomendaciones = [modulo.titulo for modulo in modulos[:3]]
-            elif porcentaje < 70:
-                # Recomendar módulos intermedios
-                mid_start = max(0, len(modulos)//2 - 1)
-                recomendaciones = [modulo.titulo for modulo in modulos[mid_start:mid_start+3]]
-            else:
-                # Recomendar módulos avanzados
-                recomendaciones = [modulo.titulo for modulo in modulos[len(modulos)//2:]]
-        else:
-            recomendaciones = ["No hay módulos disponibles actualmente"]
+        # Puntuación y módulos recomendados (calculados una vez por diagnóstico)
+        recomendacion = obtener_recomendacion(diagnostico)
+        recomendaciones = recomendacion['titulos'] or ["No hay módulos disponibles actualmente"]
 
         return render(request, 'diagnostico/resultado.html', {
             'resultados': respuestas,
             'diagnostico': diagnostico,
             'total_preguntas': 5,
-            'puntuacion_total_general': puntuacion_total,
-            'puntuacion_maxima_general': puntuacion_maxima,
-            'porcentaje_general': porcentaje,
+            'puntuacion_total_general': recomendacion['puntuacion_total'],
+            'puntuacion_maxima_general': recomendacion['puntuacion_maxima'],
+            'porcentaje_general': recomendacion['porcentaje'],
             'modulos_evaluados': 1,
             'recomendaciones': recomendaciones,
             'mensaje_generico': 'Gracias por completar el diagnóstico. Basado en tus respuestas, te recomendamos los siguientes módulos:'
@@ -192,6 +116,7 @@ def resultado_diagnostico(request):
         return redirect('/')
 
 @login_required
+@usar_replica
 def dashboard_diagnostico(request):
     """
     Dashboard principal del diagnóstico que muestra el progreso del usuario
@@ -252,44 +177,46 @@ def reiniciar_diagnostico(request):
         return redirect('/')
 
 @login_required
+@usar_replica
 def dashboard_progreso(request):
     """
     Vista para mostrar el progreso del usuario en los módulos de estudio
     """
     try:
-        # Obtener todos los módulos activos
-        total_modulos = ModuloEstudio.objects.filter(activo=True).count()
-
-        # Obtener progreso del usuario
-        progresos = ProgresoUsuario.objects.filter(usuario=request.user)
-
-        # Calcular módulos completados
-        modulos_completados = progresos.filter(completado=True).count()
-
-        # Calcular porcentaje de progreso
-        porcentaje_progreso = (modulos_completados / total_modulos * 100) if total_modulos > 0 else 0
+        # Módulos activos desde el catálogo en memoria y el progreso del
+        # usuario en una sola consulta; los totales salen de ResumenProgreso
+        completados_por_modulo = dict(
+            ProgresoUsuario.objects.filter(usuario=request.user).values_list('modulo_id', 'completado')
+        )
+        resumen = obtener_resumen(request.user)
 
         # Construir datos para la tabla
         datos_modulos = []
-        for modulo in ModuloEstudio.objects.filter(activo=True).order_by('orden'):
-            progreso = progresos.filter(modulo=modulo).first()
-            if progreso and progreso.completado:
+        modulos_comenzados = 0
+        tiempo_completado = 0
+        for modulo in obtener_catalogo().modulos:
+            completado = completados_por_modulo.get(modulo.id)
+            if completado:
                 estado = 'Completado'
-            elif progreso:
+                tiempo_completado += modulo.duracion_estimada
+            elif completado is not None:
                 estado = 'En progreso'
             else:
                 estado = 'No iniciado'
+            if completado is not None:
+                modulos_comenzados += 1
             datos_modulos.append({
                 'modulo': modulo,
                 'estado': estado
             })
 
         return render(request, 'diagnostico/dashboard_progreso.html', {
-            'modulos_completados': modulos_completados,
-            'total_modulos': total_modulos,
-            'porcentaje_progreso': round(porcentaje_progreso),
+            'modulos_completados': resumen.completados,
+            'modulos_comenzados': modulos_comenzados,
+            'tiempo_completado': tiempo_completado,
+            'total_modulos': resumen.total_modulos_activos,
+            'porcentaje_progreso': resumen.porcentaje,
             'datos_modulos': datos_modulos,
-            'progresos': progresos
         })
 
     except Exception as e:
@@ -298,7 +225,8 @@ def dashboard_progreso(request):
             'modulos_completados': 0,
             'total_modulos': 0,
             'porcentaje_progreso': 0,
+            'modulos_comenzados': 0,
+            'tiempo_completado': 0,
             'datos_modulos': [],
-            'progresos': [],
             'error': str(e)
         })
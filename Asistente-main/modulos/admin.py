@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import ModuloEstudio, Leccion
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from .exportacion import generar_zip
+from .models import ModuloEstudio, Leccion, ProgresoUsuario
 
 @admin.register(ModuloEstudio)
 class ModuloEstudioAdmin(admin.ModelAdmin):
@@ -11,4 +14,19 @@ class ModuloEstudioAdmin(admin.ModelAdmin):
 class LeccionAdmin(admin.ModelAdmin):
     list_display = ['titulo', 'modulo', 'orden', 'tipo_contenido']
     list_filter = ['modulo', 'tipo_contenido']
-    ordering = ['modulo', 'orden']
\ No newline at end of file
+    ordering = ['modulo', 'orden']
+
+@admin.register(ProgresoUsuario)
+class ProgresoUsuarioAdmin(admin.ModelAdmin):
+    list_display = ['usuario', 'modulo', 'completado', 'fecha_completado', 'puntuacion']
+    list_filter = ['completado', 'modulo', 'fecha_completado']
+    search_fields = ['usuario__username']
+    list_select_related = ['usuario', 'modulo']
+    actions = ['exportar_certificados']
+
+    @admin.action(description='Exportar certificados (ZIP)')
+    def exportar_certificados(self, request, queryset):
+        response = StreamingHttpResponse(generar_zip(queryset), content_type='application/zip')
+        nombre = f'certificados_{timezone.now():%Y%m%d_%H%M}.zip'
+        response['Content-Disposition'] = f'attachment; filename="{nombre}"'
+        return response
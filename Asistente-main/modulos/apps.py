@@ -7,7 +7,7 @@ class ModulosConfig(AppConfig):
     name = 'modulos'
 
     def ready(self):
-        pass
+        from . import signals  # noqa: F401
 
     @transaction.atomic
     def crear_modulos_iniciales(self):
@@ -0,0 +1,54 @@
+"""
+Banco de preguntas de evaluación de cada módulo.
+
+Las preguntas viven en ``data/preguntas.json`` (versionado junto al código) y
+se cargan una sola vez por proceso en estructuras inmutables indexadas por el
+``orden`` del módulo, que las vistas pueden compartir entre peticiones.
+"""
+import json
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
+
+from django.core.exceptions import ImproperlyConfigured
+
+RUTA_BANCO = Path(__file__).resolve().parent / 'data' / 'preguntas.json'
+# Formato del archivo que entiende este código; subirlo junto con el JSON si
+# cambia su estructura
+VERSION_BANCO = 1
+
+# ``seleccion`` queda en None en el banco; la vista crea una copia con la
+# respuesta del usuario solo cuando procesa un envío.
+PreguntaModulo = namedtuple('PreguntaModulo', ['numero', 'texto', 'opciones', 'correcta', 'seleccion'])
+
+
+@lru_cache(maxsize=1)
+def cargar_banco(ruta=RUTA_BANCO):
+    """Lee el archivo del banco y devuelve {orden: tupla de PreguntaModulo}"""
+    with open(ruta, encoding='utf-8') as archivo:
+        datos = json.load(archivo)
+
+    if datos.get('version') != VERSION_BANCO:
+        raise ImproperlyConfigured(
+            f"{ruta}: versión {datos.get('version')!r} del banco de preguntas, se esperaba {VERSION_BANCO}"
+        )
+
+    banco = {}
+    for orden, entradas in datos['modulos'].items():
+        banco[int(orden)] = tuple(
+            PreguntaModulo(
+                numero=numero,
+                texto=entrada['texto'],
+                opciones=MappingProxyType(dict(entrada['opciones'])),
+                correcta=entrada['correcta'],
+                seleccion=None,
+            )
+            for numero, entrada in enumerate(entradas, start=1)
+        )
+    return MappingProxyType(banco)
+
+
+def obtener_preguntas(orden):
+    """Preguntas del módulo con ese ``orden``, o una tupla vacía si no hay"""
+    return cargar_banco().get(orden, ())
@@ -0,0 +1,86 @@
+"""
+Catálogo en memoria de los módulos activos.
+
+La tabla de módulos es pequeña y casi no cambia, pero se consulta en casi
+todas las páginas. Cada proceso guarda una copia inmutable (tupla ordenada y
+mapas por id y por orden, con la cantidad de lecciones de cada módulo) y la
+reconstruye solo cuando cambia la versión del catálogo en la caché
+compartida. Las señales de ModuloEstudio y Leccion incrementan esa versión al
+confirmarse la transacción, así el cambio llega a todos los workers.
+"""
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.db.models import Count
+
+from plataforma_adaptativa.cache import espacio_modelo, invalidar, version
+from plataforma_adaptativa.routers import lectura_en_primaria
+
+from .models import ModuloEstudio
+
+ModuloCatalogo = namedtuple(
+    'ModuloCatalogo', 'id titulo descripcion orden duracion_estimada total_lecciones'
+)
+Catalogo = namedtuple('Catalogo', 'version modulos por_id por_orden')
+
+
+def version_catalogo():
+    return version(espacio_modelo(ModuloEstudio))
+
+
+def invalidar_catalogo():
+    invalidar(espacio_modelo(ModuloEstudio))
+
+
+def cargar_catalogo(numero_version):
+    """Lee los módulos activos con su cantidad de lecciones en una consulta"""
+    # Desde la principal: la copia queda marcada con la versión recién publicada
+    with lectura_en_primaria():
+        return _construir_catalogo(numero_version)
+
+
+def _construir_catalogo(numero_version):
+    modulos = tuple(
+        ModuloCatalogo(
+            id=modulo.id,
+            titulo=modulo.titulo,
+            descripcion=modulo.descripcion,
+            orden=modulo.orden,
+            duracion_estimada=modulo.duracion_estimada,
+            total_lecciones=modulo.total_lecciones,
+        )
+        for modulo in ModuloEstudio.objects.filter(activo=True)
+        .annotate(total_lecciones=Count('lecciones'))
+        .order_by('orden')
+    )
+    return Catalogo(
+        version=numero_version,
+        modulos=modulos,
+        por_id=MappingProxyType({modulo.id: modulo for modulo in modulos}),
+        por_orden=MappingProxyType({modulo.orden: modulo for modulo in modulos}),
+    )
+
+
+_catalogo = None
+_lock = threading.Lock()
+
+
+def obtener_catalogo():
+    """Catálogo vigente del proceso; solo se recarga si cambió la versión"""
+    global _catalogo
+    numero_version = version_catalogo()
+    catalogo = _catalogo
+    if catalogo is None or catalogo.version != numero_version:
+        with _lock:
+            if _catalogo is None or _catalogo.version != numero_version:
+                _catalogo = cargar_catalogo(numero_version)
+            catalogo = _catalogo
+    return catalogo
+
+
+def descartar_catalogo():
+    """Olvida la copia del proceso; la próxima lectura la vuelve a cargar"""
+    global _catalogo
+    with _lock:
+        _catalogo = None
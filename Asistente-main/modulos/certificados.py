@@ -0,0 +1,135 @@
+"""
+Certificados en PDF generados una sola vez y guardados en disco.
+
+El contenido de un certificado depende únicamente de los datos que imprime
+(usuario, módulo, fecha de completación y puntuación). El archivo se nombra
+con el hash de esos datos, así que si ya existe basta un stat() para
+servirlo, y el mismo hash sirve de ETag. La generación corre en un pool de
+hilos y se deduplica: varias peticiones del mismo certificado esperan al
+mismo render.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+# Cambiar al modificar el diseño del PDF para no servir archivos viejos
+VERSION_PLANTILLA = 1
+
+DatosCertificado = namedtuple('DatosCertificado', 'nombre titulo_modulo fecha puntuacion')
+
+
+def datos_certificado(usuario, modulo, progreso):
+    return DatosCertificado(
+        nombre=usuario.get_full_name() or usuario.username,
+        titulo_modulo=modulo.titulo,
+        fecha=progreso.fecha_completado.strftime('%d/%m/%Y'),
+        puntuacion=progreso.puntuacion,
+    )
+
+
+def huella(datos):
+    """Hash del contenido del certificado; nombre del archivo y ETag"""
+    contenido = json.dumps([VERSION_PLANTILLA, *datos], ensure_ascii=False)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+def ruta_certificado(datos):
+    codigo = huella(datos)
+    return Path(settings.CERTIFICADOS_DIR) / codigo[:2] / f'{codigo}.pdf'
+
+
+def renderizar_pdf(datos):
+    """Dibuja el certificado con ReportLab y devuelve los bytes del PDF"""
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # Título
+    p.setFont("Helvetica-Bold", 24)
+    p.drawCentredString(width / 2, height - 100, "CERTIFICADO DE COMPLETACIÓN")
+
+    # Nombre del usuario
+    p.setFont("Helvetica", 18)
+    p.drawCentredString(width / 2, height - 150, f"Otorgado a: {datos.nombre}")
+
+    # Módulo completado
+    p.setFont("Helvetica", 16)
+    p.drawCentredString(width / 2, height - 200, f"Por completar el módulo: {datos.titulo_modulo}")
+
+    # Fecha y puntuación
+    p.setFont("Helvetica", 14)
+    p.drawCentredString(width / 2, height - 250, f"Fecha de completación: {datos.fecha}")
+    p.drawCentredString(width / 2, height - 280, f"Puntuación obtenida: {datos.puntuacion}/10")
+
+    # Firma
+    p.setFont("Helvetica-Oblique", 12)
+    p.drawCentredString(width / 2, height - 350, "Plataforma Adaptativa de Aprendizaje")
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def guardar_certificado(datos, contenido=None):
+    """Guarda el PDF (generándolo si no se pasa ``contenido``) si aún no está en disco y devuelve su ruta"""
+    ruta = ruta_certificado(datos)
+    if ruta.exists():
+        return ruta
+
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    # Se escribe en un temporal del mismo directorio y se renombra de forma
+    # atómica para que nadie lea un archivo a medio escribir
+    descriptor, temporal = tempfile.mkstemp(dir=ruta.parent, suffix='.tmp')
+    try:
+        with os.fdopen(descriptor, 'wb') as archivo:
+            archivo.write(renderizar_pdf(datos) if contenido is None else contenido)
+        os.replace(temporal, ruta)
+    except BaseException:
+        os.unlink(temporal)
+        raise
+    return ruta
+
+
+_pool = None
+_en_curso = {}
+_lock = threading.Lock()
+
+
+def _obtener_pool():
+    global _pool
+    if _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'CERTIFICADOS_WORKERS', 2),
+            thread_name_prefix='certificados',
+        )
+    return _pool
+
+
+def programar_certificado(datos):
+    """Encola la generación del certificado; devuelve un Future con la ruta"""
+    codigo = huella(datos)
+    with _lock:
+        futuro = _en_curso.get(codigo)
+        if futuro is None:
+            futuro = _obtener_pool().submit(guardar_certificado, datos)
+            _en_curso[codigo] = futuro
+            futuro.add_done_callback(lambda _: _en_curso.pop(codigo, None))
+    return futuro
+
+
+def obtener_certificado(datos):
+    """Ruta del certificado, esperando su generación solo si aún no existe"""
+    ruta = ruta_certificado(datos)
+    if ruta.exists():
+        return ruta
+    return programar_certificado(datos).result()
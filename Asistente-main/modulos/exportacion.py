@@ -0,0 +1,105 @@
+"""
+Exportación masiva de certificados en un ZIP generado por partes.
+
+Los progresos se recorren en lotes: los certificados que ya están en disco
+se copian tal cual y los que faltan se dibujan en un pool de procesos (el
+render con ReportLab es trabajo de CPU). El pool solo se crea si algún lote
+tiene certificados por dibujar, y sus procesos se lanzan con ``spawn``:
+hacer fork de un worker web con hilos puede heredar candados tomados.
+
+Cada entrada se escribe en el ZIP en cuanto está lista y los bytes
+producidos se entregan enseguida, por lo que la memoria no crece con la
+cantidad de certificados y la salida puede ser un stream sin seek (stdout o
+una StreamingHttpResponse).
+"""
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from django.conf import settings
+from django.utils.text import slugify
+
+from .certificados import datos_certificado, guardar_certificado, renderizar_pdf, ruta_certificado
+
+TAMANO_LOTE = 64
+
+
+class SalidaIncremental:
+    """Destino de escritura para zipfile que acumula bytes hasta que se retiran"""
+
+    def __init__(self):
+        self.partes = []
+        self.posicion = 0
+
+    def write(self, datos):
+        self.partes.append(bytes(datos))
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+    def flush(self):
+        pass
+
+    def retirar(self):
+        datos = b''.join(self.partes)
+        self.partes.clear()
+        return datos
+
+
+def progresos_exportables(progresos):
+    """Restringe un queryset de ProgresoUsuario a los que tienen certificado"""
+    return progresos.filter(
+        completado=True, fecha_completado__isnull=False
+    ).select_related('usuario', 'modulo').order_by('id')
+
+
+def nombre_en_zip(progreso):
+    return f'{progreso.usuario.username}/modulo_{progreso.modulo.orden}_{slugify(progreso.modulo.titulo)}.pdf'
+
+
+def _lotes(iterable, tamano):
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamano))
+        if not lote:
+            return
+        yield lote
+
+
+def generar_zip(progresos, procesos=None, tamano_lote=TAMANO_LOTE):
+    """Genera los bytes del ZIP con los certificados de ``progresos``"""
+    if procesos is None:
+        procesos = getattr(settings, 'CERTIFICADOS_PROCESOS', 2)
+
+    salida = SalidaIncremental()
+    pool = None
+    try:
+        with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_DEFLATED) as archivo:
+            consulta = progresos_exportables(progresos).iterator(chunk_size=tamano_lote)
+            for lote in _lotes(consulta, tamano_lote):
+                entradas = [(nombre_en_zip(p), datos_certificado(p.usuario, p.modulo, p)) for p in lote]
+                faltantes = [datos for _, datos in entradas if not ruta_certificado(datos).exists()]
+                generados = {}
+                if faltantes:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(
+                            max_workers=procesos, mp_context=multiprocessing.get_context('spawn')
+                        )
+                    generados = dict(zip(faltantes, pool.map(renderizar_pdf, faltantes)))
+
+                for nombre, datos in entradas:
+                    contenido = generados.get(datos)
+                    if contenido is None:
+                        archivo.write(ruta_certificado(datos), nombre)
+                    else:
+                        # Se aprovecha el render para la caché de descargas individuales
+                        guardar_certificado(datos, contenido)
+                        archivo.writestr(nombre, contenido)
+                    yield salida.retirar()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    yield salida.retirar()
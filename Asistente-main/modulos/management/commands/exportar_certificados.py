@@ -0,0 +1,55 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from modulos.exportacion import generar_zip, progresos_exportables
+from modulos.models import ProgresoUsuario
+
+class Command(BaseCommand):
+    help = 'Exportar en un ZIP los certificados de los módulos completados'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--salida', default='-', help='Archivo ZIP de destino ("-" para la salida estándar)')
+        parser.add_argument('--modulo', type=int, action='append', help='Orden del módulo (se puede repetir)')
+        parser.add_argument('--usuario', action='append', help='Nombre de usuario (se puede repetir)')
+        parser.add_argument('--desde', help='Fecha de completación mínima (AAAA-MM-DD)')
+        parser.add_argument('--hasta', help='Fecha de completación máxima (AAAA-MM-DD)')
+        parser.add_argument('--procesos', type=int, help='Procesos dedicados a generar los PDF')
+
+    def handle(self, *args, **options):
+        progresos = ProgresoUsuario.objects.all()
+        if options['modulo']:
+            progresos = progresos.filter(modulo__orden__in=options['modulo'])
+        if options['usuario']:
+            progresos = progresos.filter(usuario__username__in=options['usuario'])
+        if options['desde']:
+            progresos = progresos.filter(fecha_completado__date__gte=self.fecha(options['desde'], '--desde'))
+        if options['hasta']:
+            progresos = progresos.filter(fecha_completado__date__lte=self.fecha(options['hasta'], '--hasta'))
+
+        total = progresos_exportables(progresos).count()
+        if options['salida'] == '-':
+            destino = sys.stdout.buffer
+        else:
+            destino = open(options['salida'], 'wb')
+
+        try:
+            for parte in generar_zip(progresos, procesos=options['procesos']):
+                destino.write(parte)
+        finally:
+            if destino is not sys.stdout.buffer:
+                destino.close()
+
+        self.stderr.write(f'{total} certificados exportados.')
+
+    def fecha(self, valor, opcion):
+        # parse_date devuelve None si el formato no coincide y lanza ValueError
+        # si la fecha no existe (p. ej. 2024-02-30)
+        try:
+            fecha = parse_date(valor)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            raise CommandError(f'{opcion} debe ser una fecha válida con formato AAAA-MM-DD: "{valor}"')
+        return fecha
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, Max, Q
+
+
+def poblar_resumenes(apps, schema_editor):
+    ModuloEstudio = apps.get_model('modulos', 'ModuloEstudio')
+    ProgresoUsuario = apps.get_model('modulos', 'ProgresoUsuario')
+    ResumenProgreso = apps.get_model('modulos', 'ResumenProgreso')
+
+    total = ModuloEstudio.objects.filter(activo=True).count()
+    filas = (
+        ProgresoUsuario.objects.values('usuario_id')
+        .annotate(
+            completados=Count('id', filter=Q(completado=True, modulo__activo=True)),
+            puntuacion_promedio=Avg('puntuacion'),
+            ultimo_inicio=Max('fecha_inicio'),
+            ultimo_completado=Max('fecha_completado'),
+        )
+        .order_by()
+    )
+    resumenes = []
+    for fila in filas.iterator():
+        fechas = [f for f in (fila['ultimo_inicio'], fila['ultimo_completado']) if f is not None]
+        resumenes.append(ResumenProgreso(
+            usuario_id=fila['usuario_id'],
+            completados=fila['completados'],
+            total_modulos_activos=total,
+            puntuacion_promedio=fila['puntuacion_promedio'],
+            ultima_actividad=max(fechas) if fechas else None,
+        ))
+    ResumenProgreso.objects.bulk_create(resumenes, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('modulos', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenProgreso',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='resumen_progreso', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('completados', models.PositiveIntegerField(default=0)),
+                ('total_modulos_activos', models.PositiveIntegerField(default=0)),
+                ('puntuacion_promedio', models.FloatField(blank=True, null=True)),
+                ('ultima_actividad', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
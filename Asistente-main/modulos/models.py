@@ -42,4 +42,21 @@ class ProgresoUsuario(models.Model):
         unique_together = ['usuario', 'modulo']
     
     def __str__(self):
-        return f"{self.usuario.username} - {self.modulo.titulo}"
\ No newline at end of file
+        return f"{self.usuario.username} - {self.modulo.titulo}"
+
+class ResumenProgreso(models.Model):
+    """Totales de progreso del usuario, mantenidos por modulos.resumen"""
+    usuario = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='resumen_progreso')
+    completados = models.PositiveIntegerField(default=0)
+    total_modulos_activos = models.PositiveIntegerField(default=0)
+    puntuacion_promedio = models.FloatField(null=True, blank=True)
+    ultima_actividad = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def porcentaje(self):
+        if not self.total_modulos_activos:
+            return 0
+        return round(self.completados / self.total_modulos_activos * 100)
+
+    def __str__(self):
+        return f"{self.usuario_id} - {self.completados}/{self.total_modulos_activos}"
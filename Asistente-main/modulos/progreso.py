@@ -0,0 +1,45 @@
+"""
+Transición de un ProgresoUsuario a completado.
+
+La primera aprobación se registra con un UPDATE condicionado a
+``completado=False`` o, si la fila no existe, con un INSERT protegido por la
+restricción única (usuario, modulo). Ninguno de los dos caminos lee la fila
+antes ni pisa una ``fecha_completado`` ya guardada, así que los reenvíos de
+un cliente que reintenta son inofensivos.
+"""
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import ProgresoUsuario
+from .resumen import actualizar_resumen
+
+
+def completar_modulo(usuario, modulo, puntuacion):
+    """Marca el módulo como completado; devuelve el progreso si esta llamada lo completó, o None"""
+    progreso = ProgresoUsuario(
+        usuario=usuario, modulo=modulo, completado=True,
+        fecha_completado=timezone.now(), puntuacion=puntuacion
+    )
+    pendientes = ProgresoUsuario.objects.filter(usuario=usuario, modulo=modulo, completado=False)
+    valores = {
+        'completado': True,
+        'fecha_completado': progreso.fecha_completado,
+        'puntuacion': puntuacion,
+    }
+
+    completado = pendientes.update(**valores) == 1
+    if not completado:
+        try:
+            with transaction.atomic():
+                # bulk_create no emite post_save; el resumen se actualiza abajo
+                ProgresoUsuario.objects.bulk_create([progreso])
+            completado = True
+        except IntegrityError:
+            # Ya existía: completado antes (no se toca) o creado sin completar
+            # por otra petición entre las dos sentencias
+            completado = pendientes.update(**valores) == 1
+
+    if not completado:
+        return None
+    actualizar_resumen(usuario.pk)
+    return progreso
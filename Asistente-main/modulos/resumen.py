@@ -0,0 +1,73 @@
+"""
+Mantenimiento de ResumenProgreso.
+
+Cada escritura sobre ProgresoUsuario recalcula la fila del usuario afectado
+con un único agregado (ver signals.py), y los cambios en ModuloEstudio
+actualizan el total de módulos activos. Los dashboards solo leen la fila
+por clave primaria.
+"""
+from django.db.models import Avg, Count, Max, Q
+
+from plataforma_adaptativa.routers import lectura_en_primaria
+
+from .models import ModuloEstudio, ProgresoUsuario, ResumenProgreso
+
+
+def _ultima(*fechas):
+    fechas = [fecha for fecha in fechas if fecha is not None]
+    return max(fechas) if fechas else None
+
+
+def calcular_resumen(usuario_id, total_modulos_activos=None):
+    """Valores actuales del resumen de un usuario, sin guardarlos"""
+    # Se guardan en la principal, así que se calculan con sus datos
+    with lectura_en_primaria():
+        if total_modulos_activos is None:
+            total_modulos_activos = ModuloEstudio.objects.filter(activo=True).count()
+        datos = ProgresoUsuario.objects.filter(usuario_id=usuario_id).aggregate(
+            completados=Count('id', filter=Q(completado=True, modulo__activo=True)),
+            puntuacion_promedio=Avg('puntuacion'),
+            ultimo_inicio=Max('fecha_inicio'),
+            ultimo_completado=Max('fecha_completado'),
+        )
+    return {
+        'completados': datos['completados'],
+        'total_modulos_activos': total_modulos_activos,
+        'puntuacion_promedio': datos['puntuacion_promedio'],
+        'ultima_actividad': _ultima(datos['ultimo_inicio'], datos['ultimo_completado']),
+    }
+
+
+def actualizar_resumen(usuario_id, crear=True):
+    """Recalcula y guarda el resumen de un usuario.
+
+    Con ``crear=False`` solo se actualiza una fila existente; es lo que usan
+    los borrados, que pueden venir de la eliminación en cascada del usuario.
+    """
+    valores = calcular_resumen(usuario_id)
+    if not crear:
+        ResumenProgreso.objects.filter(usuario_id=usuario_id).update(**valores)
+        return None
+    resumen, _ = ResumenProgreso.objects.update_or_create(usuario_id=usuario_id, defaults=valores)
+    return resumen
+
+
+def actualizar_total_modulos(modulo_id=None):
+    """Propaga un cambio en el catálogo de módulos a los resúmenes existentes"""
+    total = ModuloEstudio.objects.filter(activo=True).count()
+    ResumenProgreso.objects.exclude(total_modulos_activos=total).update(total_modulos_activos=total)
+    if modulo_id is not None:
+        # Activar o desactivar un módulo cambia los completados de quienes lo cursaron
+        usuarios = ProgresoUsuario.objects.filter(modulo_id=modulo_id).values_list('usuario_id', flat=True)
+        for usuario_id in usuarios.distinct():
+            ResumenProgreso.objects.update_or_create(
+                usuario_id=usuario_id, defaults=calcular_resumen(usuario_id, total)
+            )
+
+
+def obtener_resumen(usuario):
+    """Resumen del usuario; se crea en la primera consulta si aún no existe"""
+    try:
+        return ResumenProgreso.objects.get(pk=usuario.pk)
+    except ResumenProgreso.DoesNotExist:
+        return actualizar_resumen(usuario.pk)
@@ -0,0 +1,50 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .catalogo import invalidar_catalogo
+from .models import Leccion, ModuloEstudio, ProgresoUsuario
+from .resumen import actualizar_resumen, actualizar_total_modulos
+
+
+@receiver(post_save, sender=ProgresoUsuario)
+def progreso_guardado(sender, instance, **kwargs):
+    actualizar_resumen(instance.usuario_id)
+
+
+@receiver(post_delete, sender=ProgresoUsuario)
+def progreso_eliminado(sender, instance, **kwargs):
+    actualizar_resumen(instance.usuario_id, crear=False)
+
+
+@receiver(pre_save, sender=ModuloEstudio)
+def modulo_por_guardar(sender, instance, using, **kwargs):
+    # Se recuerda el estado anterior para recalcular los resúmenes solo si cambia
+    instance._activo_anterior = None
+    if instance.pk is not None:
+        instance._activo_anterior = sender._base_manager.using(using).filter(
+            pk=instance.pk
+        ).values_list('activo', flat=True).first()
+
+
+@receiver(post_save, sender=ModuloEstudio)
+def modulo_guardado(sender, instance, created, **kwargs):
+    transaction.on_commit(invalidar_catalogo)
+    if created:
+        actualizar_total_modulos()
+    elif getattr(instance, '_activo_anterior', None) != instance.activo:
+        # Editar título o descripción no altera los totales de nadie
+        actualizar_total_modulos(instance.pk)
+
+
+@receiver(post_delete, sender=ModuloEstudio)
+def modulo_eliminado(sender, instance, **kwargs):
+    transaction.on_commit(invalidar_catalogo)
+    # Los progresos del módulo ya se borraron en cascada y recalcularon su resumen
+    actualizar_total_modulos()
+
+
+@receiver([post_save, post_delete], sender=Leccion)
+def leccion_modificada(sender, instance, **kwargs):
+    # El catálogo guarda la cantidad de lecciones de cada módulo
+    transaction.on_commit(invalidar_catalogo)
@@ -1,3 +1,265 @@
-from django.test import TestCase
+import json
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .banco_preguntas import VERSION_BANCO, cargar_banco, obtener_preguntas
+from .catalogo import descartar_catalogo, obtener_catalogo
+from .certificados import datos_certificado, guardar_certificado, renderizar_pdf
+from .exportacion import generar_zip
+from .models import Leccion, ModuloEstudio, ProgresoUsuario, ResumenProgreso
+from .progreso import completar_modulo
+from .resumen import obtener_resumen
+
+
+class ResumenProgresoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        cls.modulos = [
+            ModuloEstudio.objects.create(titulo=f'Módulo {orden}', descripcion='', orden=orden, duracion_estimada=30)
+            for orden in range(1, 5)
+        ]
+
+    def test_se_mantiene_con_cada_escritura(self):
+        ProgresoUsuario.objects.create(usuario=self.usuario, modulo=self.modulos[0], completado=True, puntuacion=8)
+        progreso = ProgresoUsuario.objects.create(usuario=self.usuario, modulo=self.modulos[1], puntuacion=6)
+
+        resumen = ResumenProgreso.objects.get(pk=self.usuario.pk)
+        self.assertEqual((resumen.completados, resumen.total_modulos_activos), (1, 4))
+        self.assertEqual(resumen.puntuacion_promedio, 7)
+        self.assertEqual(resumen.porcentaje, 25)
+
+        progreso.completado = True
+        progreso.save()
+        self.assertEqual(ResumenProgreso.objects.get(pk=self.usuario.pk).completados, 2)
+
+        progreso.delete()
+        self.assertEqual(ResumenProgreso.objects.get(pk=self.usuario.pk).completados, 1)
+
+    def test_cambios_en_el_catalogo(self):
+        ProgresoUsuario.objects.create(usuario=self.usuario, modulo=self.modulos[0], completado=True)
+
+        self.modulos[0].activo = False
+        self.modulos[0].save()
+        resumen = ResumenProgreso.objects.get(pk=self.usuario.pk)
+        self.assertEqual((resumen.completados, resumen.total_modulos_activos), (0, 3))
+
+        ModuloEstudio.objects.create(titulo='Nuevo', descripcion='', orden=9, duracion_estimada=10)
+        self.assertEqual(ResumenProgreso.objects.get(pk=self.usuario.pk).total_modulos_activos, 4)
+
+    def test_editar_titulo_no_recalcula_resumenes(self):
+        ProgresoUsuario.objects.create(usuario=self.usuario, modulo=self.modulos[0], completado=True)
+        modulo = ModuloEstudio.objects.get(pk=self.modulos[0].pk)
+        modulo.titulo = 'Otro título'
+        # estado anterior + UPDATE del módulo
+        with self.assertNumQueries(2):
+            modulo.save()
+
+        modulo.activo = False
+        modulo.save()
+        self.assertEqual(ResumenProgreso.objects.get(pk=self.usuario.pk).completados, 0)
+
+    def test_lectura_por_clave_primaria(self):
+        obtener_resumen(self.usuario)
+        with self.assertNumQueries(1):
+            obtener_resumen(self.usuario)
+
+    def test_eliminar_usuario(self):
+        ProgresoUsuario.objects.create(usuario=self.usuario, modulo=self.modulos[0], completado=True)
+        self.usuario.delete()
+        self.assertFalse(ResumenProgreso.objects.exists())
+
+
+class DescargarCertificadoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        cls.modulo = ModuloEstudio.objects.create(titulo='Seguridad', descripcion='', orden=1, duracion_estimada=30)
+        ProgresoUsuario.objects.create(
+            usuario=cls.usuario, modulo=cls.modulo, completado=True,
+            fecha_completado=timezone.now(), puntuacion=9
+        )
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.enterContext(override_settings(CERTIFICADOS_DIR=directorio.name))
+        self.client.force_login(self.usuario)
+        self.url = reverse('modulos:descargar_certificado', args=[self.modulo.id])
+
+    def test_se_genera_una_vez(self):
+        with mock.patch('modulos.certificados.renderizar_pdf', wraps=renderizar_pdf) as renderizar:
+            primera = self.client.get(self.url)
+            segunda = self.client.get(self.url)
+
+        self.assertEqual(renderizar.call_count, 1)
+        self.assertEqual(primera['Content-Type'], 'application/pdf')
+        self.assertTrue(b''.join(primera.streaming_content).startswith(b'%PDF'))
+        self.assertEqual(primera['ETag'], segunda['ETag'])
+
+    def test_if_none_match_devuelve_304(self):
+        etag = self.client.get(self.url)['ETag']
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+
+
+class ExportarCertificadosTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        modulo = ModuloEstudio.objects.create(titulo='Seguridad Informática', descripcion='', orden=4, duracion_estimada=40)
+        for nombre in ('ana', 'luis', 'eva'):
+            usuario = User.objects.create_user(nombre, password='clave-segura-123')
+            ProgresoUsuario.objects.create(
+                usuario=usuario, modulo=modulo, completado=nombre != 'eva',
+                fecha_completado=timezone.now(), puntuacion=8
+            )
+
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        self.directorio = directorio.name
+        self.enterContext(override_settings(CERTIFICADOS_DIR=self.directorio))
+
+    def test_comando_escribe_el_zip(self):
+        # Uno de los certificados ya estaba generado; el otro se dibuja en el pool
+        progreso = ProgresoUsuario.objects.select_related('usuario', 'modulo').get(usuario__username='ana')
+        guardar_certificado(datos_certificado(progreso.usuario, progreso.modulo, progreso))
+
+        destino = f'{self.directorio}/cohorte.zip'
+        call_command('exportar_certificados', salida=destino, procesos=1, stderr=StringIO())
+
+        with zipfile.ZipFile(destino) as archivo:
+            self.assertEqual(archivo.namelist(), [
+                'ana/modulo_4_seguridad-informatica.pdf',
+                'luis/modulo_4_seguridad-informatica.pdf',
+            ])
+            for nombre in archivo.namelist():
+                self.assertTrue(archivo.read(nombre).startswith(b'%PDF'))
+
+    def test_fecha_invalida_es_un_error(self):
+        destino = f'{self.directorio}/cohorte.zip'
+        for opcion, valor in (('desde', '18/10/2026'), ('hasta', '2026-02-30')):
+            with self.subTest(opcion=opcion), self.assertRaisesMessage(CommandError, f'--{opcion}'):
+                call_command('exportar_certificados', salida=destino, **{opcion: valor})
+
+    def test_sin_faltantes_no_crea_el_pool(self):
+        for progreso in ProgresoUsuario.objects.select_related('usuario', 'modulo').filter(completado=True):
+            guardar_certificado(datos_certificado(progreso.usuario, progreso.modulo, progreso))
+
+        with mock.patch('modulos.exportacion.ProcessPoolExecutor') as pool:
+            contenido = b''.join(generar_zip(ProgresoUsuario.objects.all()))
+        pool.assert_not_called()
+        with zipfile.ZipFile(BytesIO(contenido)) as archivo:
+            self.assertEqual(len(archivo.namelist()), 2)
+
+
+class DetalleModuloTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        cls.modulo = ModuloEstudio.objects.create(titulo='Fundamentos', descripcion='', orden=1, duracion_estimada=60)
+        Leccion.objects.create(modulo=cls.modulo, titulo='Intro', contenido='...', orden=1, tipo_contenido='teoria')
+
+    def setUp(self):
+        self.client.force_login(self.usuario)
+        self.url = reverse('modulos:detalle_modulo', args=[self.modulo.id])
+
+    def respuestas(self, correctas):
+        return {
+            f'pregunta_{entrada.numero}': entrada.correcta if i < correctas else 'x'
+            for i, entrada in enumerate(obtener_preguntas(self.modulo.orden))
+        }
+
+    def test_pagina_en_dos_consultas(self):
+        # sesión + usuario + módulo con su estado + lecciones
+        with self.assertNumQueries(4):
+            respuesta = self.client.get(self.url)
+        self.assertFalse(respuesta.context['completado'])
+
+    def test_reenvio_no_pisa_la_primera_aprobacion(self):
+        with mock.patch('modulos.views.programar_certificado'):
+            with self.captureOnCommitCallbacks(execute=True):
+                respuesta = self.client.post(self.url, self.respuestas(8))
+            self.assertTrue(respuesta.context['completado'])
+            primera = ProgresoUsuario.objects.get()
+
+            respuesta = self.client.post(self.url, self.respuestas(10))
+            self.assertTrue(respuesta.context['completado'])
+
+        progreso = ProgresoUsuario.objects.get()
+        self.assertEqual((progreso.fecha_completado, progreso.puntuacion), (primera.fecha_completado, 8))
+        self.assertEqual(ResumenProgreso.objects.get(pk=self.usuario.pk).completados, 1)
+
+    def test_completa_un_progreso_existente(self):
+        ProgresoUsuario.objects.create(usuario=self.usuario, modulo=self.modulo)
+
+        self.assertIsNotNone(completar_modulo(self.usuario, self.modulo, 9))
+        self.assertIsNone(completar_modulo(self.usuario, self.modulo, 10))
+        self.assertEqual(ProgresoUsuario.objects.get().puntuacion, 9)
+
+
+class CatalogoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.modulo = ModuloEstudio.objects.create(titulo='Redes', descripcion='', orden=2, duracion_estimada=20)
+        ModuloEstudio.objects.create(titulo='Oculto', descripcion='', orden=3, duracion_estimada=20, activo=False)
+        Leccion.objects.create(modulo=cls.modulo, titulo='Intro', contenido='...', orden=1, tipo_contenido='teoria')
+
+    def setUp(self):
+        descartar_catalogo()
+
+    def test_modulos_activos_con_lecciones(self):
+        catalogo = obtener_catalogo()
+        self.assertEqual([modulo.titulo for modulo in catalogo.modulos], ['Redes'])
+        self.assertEqual(catalogo.por_orden[2].total_lecciones, 1)
+        self.assertIs(catalogo.por_id[self.modulo.id], catalogo.modulos[0])
+        with self.assertNumQueries(0):
+            obtener_catalogo()
+
+    def test_senales_invalidan_el_catalogo(self):
+        obtener_catalogo()
+        with self.captureOnCommitCallbacks(execute=True):
+            Leccion.objects.create(modulo=self.modulo, titulo='Más', contenido='...', orden=2, tipo_contenido='teoria')
+        self.assertEqual(obtener_catalogo().por_id[self.modulo.id].total_lecciones, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ModuloEstudio.objects.filter(pk=self.modulo.pk).get().delete()
+        self.assertEqual(obtener_catalogo().modulos, ())
+
+
+class BancoPreguntasTests(TestCase):
+    def escribir_banco(self, datos):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        ruta = f'{directorio.name}/preguntas.json'
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo)
+        return ruta
+
+    def test_preguntas_por_orden_de_modulo(self):
+        preguntas = obtener_preguntas(1)
+        self.assertTrue(preguntas)
+        self.assertEqual([p.numero for p in preguntas], list(range(1, len(preguntas) + 1)))
+        self.assertIn(preguntas[0].correcta, preguntas[0].opciones)
+        self.assertIsNone(preguntas[0].seleccion)
+        self.assertEqual(obtener_preguntas(999), ())
+
+    def test_banco_inmutable(self):
+        with self.assertRaises(TypeError):
+            cargar_banco()[1] = ()
+        with self.assertRaises(TypeError):
+            obtener_preguntas(1)[0].opciones['A'] = 'otra'
+
+    def test_version_desconocida(self):
+        ruta = self.escribir_banco({'version': VERSION_BANCO + 1, 'modulos': {}})
+        with self.assertRaises(ImproperlyConfigured):
+            cargar_banco(ruta)
@@ -8,9 +8,19 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
 
 import os
+import threading
 
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'plataforma_adaptativa.settings')
 
 application = get_asgi_application()
+
+# Construir el índice del tutor antes de atender la primera petición. Los
+# servidores ASGI importan este módulo dentro del event loop, donde el ORM
+# síncrono no está permitido, así que se construye en un hilo aparte.
+from tutor_ia.services import precargar_tutor  # noqa: E402
+
+_precarga = threading.Thread(target=precargar_tutor, name='precargar-tutor')
+_precarga.start()
+_precarga.join()
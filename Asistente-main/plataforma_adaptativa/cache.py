@@ -0,0 +1,167 @@
+"""
+Utilidades de caché compartidas por las apps.
+
+- ``construir_clave('diagnostico', 'cuestionario', 3)`` arma claves con un
+  formato único para todo el proyecto.
+- Cada espacio de nombres (por lo general la etiqueta de un modelo, ver
+  ``espacio_modelo``) tiene un contador de versión en la caché.
+  ``clave_versionada`` lo incluye en la clave e ``invalidar`` lo incrementa,
+  con lo que todas las entradas del espacio quedan obsoletas sin recorrerlas.
+- ``obtener_o_calcular`` implementa cache-aside con protección contra
+  estampidas: un candado por clave en el proceso y otro compartido
+  (``cache.add``) hacen que solo un worker recalcule un valor ausente
+  mientras el resto espera a que lo publique. El cálculo siempre lee de la
+  base principal. ``aobtener_o_calcular`` es la variante asíncrona.
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .routers import lectura_en_primaria
+
+SEPARADOR = ':'
+DURACION_CANDADO = 10
+INTERVALO_ESPERA = 0.05
+INTENTOS_ESPERA = 40
+
+_AUSENTE = object()
+_candados = {}
+_registro_candados = threading.Lock()
+
+
+def construir_clave(*partes):
+    return SEPARADOR.join(str(parte) for parte in partes)
+
+
+def espacio_modelo(modelo, pk=None):
+    """Espacio de nombres de un modelo (o de una de sus filas)"""
+    etiqueta = modelo._meta.label_lower
+    return etiqueta if pk is None else construir_clave(etiqueta, pk)
+
+
+def _clave_version(espacio):
+    return construir_clave('version', espacio)
+
+
+def version(espacio):
+    """Versión vigente de un espacio de nombres"""
+    clave = _clave_version(espacio)
+    valor = cache.get(clave)
+    if valor is None:
+        cache.add(clave, 1, None)
+        valor = cache.get(clave, 1)
+    return valor
+
+
+def invalidar(espacio):
+    """Deja obsoletas todas las claves versionadas del espacio"""
+    clave = _clave_version(espacio)
+    cache.add(clave, 1, None)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        return None
+
+
+def clave_versionada(espacio, *partes):
+    return construir_clave(espacio, f'v{version(espacio)}', *partes)
+
+
+@contextmanager
+def _candado_local(clave):
+    """Candado del proceso para una sola clave; se descarta cuando nadie lo usa"""
+    with _registro_candados:
+        candado, usos = _candados.get(clave, (None, 0))
+        if candado is None:
+            candado = threading.Lock()
+        _candados[clave] = (candado, usos + 1)
+    try:
+        with candado:
+            yield
+    finally:
+        with _registro_candados:
+            usos = _candados[clave][1] - 1
+            if usos:
+                _candados[clave] = (candado, usos)
+            else:
+                del _candados[clave]
+
+
+def _esperar_valor(clave):
+    for _ in range(INTENTOS_ESPERA):
+        time.sleep(INTERVALO_ESPERA)
+        valor = cache.get(clave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+    return _AUSENTE
+
+
+async def _aesperar_valor(clave):
+    for _ in range(INTENTOS_ESPERA):
+        await asyncio.sleep(INTERVALO_ESPERA)
+        valor = await cache.aget(clave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+    return _AUSENTE
+
+
+def obtener_o_calcular(clave, calcular, timeout=DEFAULT_TIMEOUT):
+    """Valor en caché de ``clave``; si falta, lo calcula un único llamador y lo guarda"""
+    valor = cache.get(clave, _AUSENTE)
+    if valor is not _AUSENTE:
+        return valor
+
+    # El candado es de esta clave: esperar o calcular no frena a otras claves
+    with _candado_local(clave):
+        valor = cache.get(clave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+
+        clave_candado = construir_clave(clave, 'calculando')
+        propio = cache.add(clave_candado, 1, DURACION_CANDADO)
+        if not propio:
+            # Otro worker lo está calculando; si no termina a tiempo se calcula igual
+            valor = _esperar_valor(clave)
+            if valor is not _AUSENTE:
+                return valor
+
+        try:
+            # Lo que se guarda en caché dura más que el retraso de la réplica
+            with lectura_en_primaria():
+                valor = calcular()
+            cache.set(clave, valor, timeout)
+        finally:
+            if propio:
+                cache.delete(clave_candado)
+        return valor
+
+
+async def aobtener_o_calcular(clave, calcular, timeout=DEFAULT_TIMEOUT):
+    """Variante asíncrona de obtener_o_calcular(); ``calcular`` es una corrutina.
+
+    Solo usa el candado compartido, que también ordena a las corrutinas del
+    propio proceso sin bloquear el event loop.
+    """
+    valor = await cache.aget(clave, _AUSENTE)
+    if valor is not _AUSENTE:
+        return valor
+
+    clave_candado = construir_clave(clave, 'calculando')
+    propio = await cache.aadd(clave_candado, 1, DURACION_CANDADO)
+    if not propio:
+        valor = await _aesperar_valor(clave)
+        if valor is not _AUSENTE:
+            return valor
+
+    try:
+        with lectura_en_primaria():
+            valor = await calcular()
+        await cache.aset(clave, valor, timeout)
+    finally:
+        if propio:
+            await cache.adelete(clave_candado)
+    return valor
@@ -0,0 +1,111 @@
+"""
+Enrutamiento de lecturas a la réplica.
+
+Solo las vistas marcadas con ``@usar_replica`` (dashboards, listados y
+resultados) leen de la réplica; todo lo demás, y cualquier escritura, va a
+la base principal. Después de una petición que escribe, el middleware deja
+una cookie de vida corta que obliga a ese usuario a leer de la principal
+mientras la réplica se pone al día (lectura de lo propio escrito).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+ALIAS_REPLICA = 'replica'
+COOKIE_PRIMARIA = 'leer_primaria'
+METODOS_SEGUROS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+_alias_lectura = ContextVar('alias_lectura', default=None)
+
+
+@contextmanager
+def lectura_en(alias):
+    """Dirige las lecturas del bloque a ``alias`` (None = decisión por defecto)"""
+    token = _alias_lectura.set(alias)
+    try:
+        yield
+    finally:
+        _alias_lectura.reset(token)
+
+
+def lectura_en_primaria():
+    """Para datos que se guardan en caché y sobreviven al retraso de la réplica"""
+    return lectura_en(DEFAULT_DB_ALIAS)
+
+
+def usar_replica(vista):
+    """Decorador de vistas de solo lectura que pueden servirse desde la réplica"""
+    if iscoroutinefunction(vista):
+        @wraps(vista)
+        async def envoltura_async(request, *args, **kwargs):
+            if getattr(request, 'leer_primaria', False):
+                return await vista(request, *args, **kwargs)
+            with lectura_en(ALIAS_REPLICA):
+                return await vista(request, *args, **kwargs)
+        return envoltura_async
+
+    @wraps(vista)
+    def envoltura(request, *args, **kwargs):
+        if getattr(request, 'leer_primaria', False):
+            return vista(request, *args, **kwargs)
+        with lectura_en(ALIAS_REPLICA):
+            return vista(request, *args, **kwargs)
+    return envoltura
+
+
+class RouterReplica:
+    def db_for_read(self, model, **hints):
+        alias = _alias_lectura.get()
+        if alias == ALIAS_REPLICA and ALIAS_REPLICA not in settings.DATABASES:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica contiene los mismos datos que la principal
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != ALIAS_REPLICA
+
+
+class LecturaPrimariaMiddleware:
+    """Marca las peticiones de usuarios que acaban de escribir para que no lean de la réplica"""
+    # Admite ambos modos para que bajo ASGI las vistas asíncronas no pasen por un hilo
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        self.marcar(request)
+        return self.procesar_respuesta(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        self.marcar(request)
+        return self.procesar_respuesta(request, await self.get_response(request))
+
+    def marcar(self, request):
+        request.leer_primaria = (
+            request.method not in METODOS_SEGUROS or COOKIE_PRIMARIA in request.COOKIES
+        )
+
+    def procesar_respuesta(self, request, response):
+        if request.method not in METODOS_SEGUROS and response.status_code < 400:
+            response.set_cookie(
+                COOKIE_PRIMARIA, '1',
+                max_age=getattr(settings, 'REPLICA_RETRASO_MAXIMO', 5),
+                httponly=True, samesite='Lax',
+            )
+        return response
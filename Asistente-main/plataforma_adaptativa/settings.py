@@ -51,6 +51,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'plataforma_adaptativa.routers.LecturaPrimariaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -87,9 +88,62 @@ DATABASES = {
             'client_encoding': 'UTF8',
             'options': '-c client_encoding=utf8'
         },
-        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
+
+# Por defecto cada worker mantiene conexiones persistentes (CONN_MAX_AGE).
+# Con DB_POOL=1 se usa el pool nativo de psycopg 3, que requiere instalar
+# 'psycopg[pool]' (no funciona con psycopg2); Django exige entonces
+# CONN_MAX_AGE = 0.
+if os.environ.get('DB_POOL', '0') != '0':
+    DATABASES['default']['OPTIONS']['pool'] = {
+        'min_size': int(os.environ.get('DB_POOL_MIN', 2)),
+        'max_size': int(os.environ.get('DB_POOL_MAX', 10)),
+        'timeout': 10,
+    }
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = 600
+
+# Réplica de solo lectura para dashboards y catálogo (ver routers.py). En los
+# tests apunta a la base de pruebas de 'default' mediante MIRROR.
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ['DB_REPLICA_HOST'],
+        'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['plataforma_adaptativa.routers.RouterReplica']
+
+# Segundos que un usuario sigue leyendo de la base principal después de
+# escribir, para no ver datos atrasados de la réplica
+REPLICA_RETRASO_MAXIMO = 5
+
+# Caché compartida entre workers. CACHE_URL elige el backend:
+#   redis://host:6379/0, pymemcache://host:11211 o file:///ruta/al/directorio
+# Sin CACHE_URL (desarrollo y tests) se usa la caché en memoria del proceso.
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    _CACHE_BACKEND = {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}
+elif CACHE_URL.startswith('pymemcache://'):
+    _CACHE_BACKEND = {'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache', 'LOCATION': CACHE_URL[len('pymemcache://'):]}
+elif CACHE_URL.startswith('file://'):
+    _CACHE_BACKEND = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_URL[len('file://'):]}
+else:
+    _CACHE_BACKEND = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'plataforma-adaptativa'}
+
+CACHES = {
+    'default': {
+        **_CACHE_BACKEND,
+        'KEY_PREFIX': 'plataforma',
+        'TIMEOUT': 300,
+    }
+}
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -124,6 +178,30 @@ else:
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Tutor IA: aplicar por defecto la corrección de errores de tipeo en el chat
+# (cada petición puede sobrescribirla con el campo "difuso")
+TUTOR_IA_MODO_DIFUSO = False
+
+# Tutor IA: cantidad máxima de mensajes aceptados por el endpoint por lotes
+TUTOR_IA_MAX_LOTE = 50
+
+# Tutor IA: los mensajes del chat se guardan por lotes cuando se acumulan
+# TUTOR_IA_BUFFER_TAMANO o pasan TUTOR_IA_BUFFER_SEGUNDOS desde el primero
+TUTOR_IA_BUFFER_TAMANO = 50
+TUTOR_IA_BUFFER_SEGUNDOS = 2.0
+
+# Tutor IA: caché de respuestas (entradas en memoria por proceso y vigencia)
+TUTOR_IA_CACHE_TAMANO = 1024
+TUTOR_IA_CACHE_SEGUNDOS = 300
+
+# Certificados en PDF: directorio donde se guardan (nombrados por el hash de
+# su contenido) e hilos dedicados a generarlos
+CERTIFICADOS_DIR = os.environ.get('CERTIFICADOS_DIR', os.path.join(BASE_DIR, 'certificados'))
+CERTIFICADOS_WORKERS = 2
+# Procesos para la exportación masiva; se acota para que una exportación
+# desde el admin no acapare todas las CPU del servidor web
+CERTIFICADOS_PROCESOS = int(os.environ.get('CERTIFICADOS_PROCESOS', 2))
+
 # Login redirects
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/'
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from .cache import aobtener_o_calcular, clave_versionada, invalidar, obtener_o_calcular
+from .routers import (
+    ALIAS_REPLICA, COOKIE_PRIMARIA, LecturaPrimariaMiddleware, RouterReplica, usar_replica,
+)
+
+
+class CacheTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_invalidar_cambia_la_clave(self):
+        antes = clave_versionada('pruebas.modelo', 'lista')
+        invalidar('pruebas.modelo')
+        self.assertNotEqual(clave_versionada('pruebas.modelo', 'lista'), antes)
+        self.assertEqual(clave_versionada('pruebas.otro', 'lista'), 'pruebas.otro:v1:lista')
+
+    def test_guarda_valores_nulos(self):
+        llamadas = []
+        for _ in range(2):
+            obtener_o_calcular('pruebas:nulo', lambda: llamadas.append(1))
+        self.assertEqual(len(llamadas), 1)
+
+    def test_un_solo_calculo_con_llamadas_simultaneas(self):
+        llamadas = []
+        resultados = []
+        barrera = threading.Barrier(8)
+
+        def calcular():
+            llamadas.append(1)
+            time.sleep(0.1)
+            return 'valor'
+
+        def consultar():
+            barrera.wait()
+            resultados.append(obtener_o_calcular('pruebas:lento', calcular))
+
+        hilos = [threading.Thread(target=consultar) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(resultados, ['valor'] * 8)
+
+    def test_un_calculo_lento_no_frena_otras_claves(self):
+        empezado = threading.Event()
+        hilo = threading.Thread(
+            target=obtener_o_calcular,
+            args=('pruebas:lento', lambda: empezado.set() or time.sleep(0.5)),
+        )
+        hilo.start()
+        empezado.wait()
+
+        inicio = time.monotonic()
+        self.assertEqual(obtener_o_calcular('pruebas:rapido', lambda: 'valor'), 'valor')
+        self.assertLess(time.monotonic() - inicio, 0.25)
+        hilo.join()
+
+    async def test_variante_asincrona(self):
+        llamadas = []
+
+        async def calcular():
+            llamadas.append(1)
+            await asyncio.sleep(0.1)
+            return 'valor'
+
+        resultados = await asyncio.gather(
+            *(aobtener_o_calcular('pruebas:asincrono', calcular) for _ in range(5))
+        )
+        self.assertEqual(len(llamadas), 1)
+        self.assertEqual(resultados, ['valor'] * 5)
+
+
+class RouterReplicaTests(SimpleTestCase):
+    def setUp(self):
+        self.router = RouterReplica()
+        self.factory = RequestFactory()
+        self.enterContext(mock.patch.dict(settings.DATABASES, {ALIAS_REPLICA: {}}))
+
+    def alias_en_vista(self, request):
+        @usar_replica
+        def vista(request):
+            return HttpResponse(self.router.db_for_read(None))
+        return vista(request).content.decode()
+
+    def procesar(self, request):
+        middleware = LecturaPrimariaMiddleware(lambda r: HttpResponse(self.alias_en_vista(r)))
+        return middleware(request)
+
+    def test_solo_las_vistas_marcadas_leen_de_la_replica(self):
+        self.assertIsNone(self.router.db_for_read(None))
+        self.assertEqual(self.alias_en_vista(self.factory.get('/')), ALIAS_REPLICA)
+        self.assertEqual(self.router.db_for_write(None), 'default')
+
+    def test_sin_replica_configurada_usa_la_principal(self):
+        del settings.DATABASES[ALIAS_REPLICA]
+        self.assertEqual(self.alias_en_vista(self.factory.get('/')), 'default')
+
+    def test_lectura_de_lo_escrito(self):
+        respuesta = self.procesar(self.factory.post('/'))
+        self.assertIn(COOKIE_PRIMARIA, respuesta.cookies)
+
+        siguiente = self.factory.get('/')
+        siguiente.COOKIES[COOKIE_PRIMARIA] = '1'
+        self.assertEqual(self.procesar(siguiente).content.decode(), 'None')
+
+        self.assertEqual(self.procesar(self.factory.get('/')).content.decode(), ALIAS_REPLICA)
+
+    async def test_modo_asincrono(self):
+        @usar_replica
+        async def vista(request):
+            return HttpResponse(self.router.db_for_read(None))
+
+        async def siguiente(request):
+            return await vista(request)
+
+        middleware = LecturaPrimariaMiddleware(siguiente)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertTrue(iscoroutinefunction(vista))
+
+        respuesta = await middleware(self.factory.get('/'))
+        self.assertEqual(respuesta.content.decode(), ALIAS_REPLICA)
+        respuesta = await middleware(self.factory.post('/'))
+        self.assertEqual(respuesta.content.decode(), 'None')
+        self.assertIn(COOKIE_PRIMARIA, respuesta.cookies)
+        self.assertIsNone(self.router.db_for_read(None))
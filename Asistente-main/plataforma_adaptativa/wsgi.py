@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'plataforma_adaptativa.settings')
 
 application = get_wsgi_application()
+
+# Construir el índice del tutor antes de atender la primera petición
+from tutor_ia.services import precargar_tutor  # noqa: E402
+
+precargar_tutor()
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class TutorIaConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tutor_ia'
+
+    def ready(self):
+        # Compilar el autómata de palabras clave al arrancar el proceso
+        from .automata import obtener_faqs_compiladas
+        obtener_faqs_compiladas()
+
+        from . import signals  # noqa: F401
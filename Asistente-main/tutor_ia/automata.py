@@ -0,0 +1,118 @@
+"""
+Autómata Aho–Corasick para buscar palabras clave dentro de un mensaje.
+
+Se construye una sola vez por proceso a partir de las claves normalizadas
+de ``tutor_ia.faqs`` y recorre el mensaje en una única pasada, sin importar
+cuántas palabras clave existan.
+"""
+import threading
+from collections import deque
+
+from . import faqs
+from .normalizacion import normalizar
+from .ortografia import CorrectorOrtografico
+
+
+class AutomataPalabrasClave:
+    """Encuentra la primera palabra clave (según su orden) contenida en un texto"""
+
+    def __init__(self, palabras_clave):
+        # Cada nodo es un dict de transiciones; ``salidas[n]`` guarda el menor
+        # índice de palabra clave que termina en el nodo o en sus sufijos.
+        self.palabras = list(palabras_clave)
+        self.transiciones = [{}]
+        self.fallos = [0]
+        self.salidas = [None]
+
+        for indice, palabra in enumerate(self.palabras):
+            nodo = 0
+            for caracter in palabra:
+                siguiente = self.transiciones[nodo].get(caracter)
+                if siguiente is None:
+                    siguiente = len(self.transiciones)
+                    self.transiciones.append({})
+                    self.fallos.append(0)
+                    self.salidas.append(None)
+                    self.transiciones[nodo][caracter] = siguiente
+                nodo = siguiente
+            if self.salidas[nodo] is None:
+                self.salidas[nodo] = indice
+
+        self._calcular_fallos()
+
+    def _calcular_fallos(self):
+        cola = deque(self.transiciones[0].values())
+        while cola:
+            nodo = cola.popleft()
+            for caracter, hijo in self.transiciones[nodo].items():
+                cola.append(hijo)
+                fallo = self.fallos[nodo]
+                while fallo and caracter not in self.transiciones[fallo]:
+                    fallo = self.fallos[fallo]
+                destino = self.transiciones[fallo].get(caracter, 0)
+                self.fallos[hijo] = destino if destino != hijo else 0
+                heredada = self.salidas[self.fallos[hijo]]
+                propia = self.salidas[hijo]
+                if heredada is not None and (propia is None or heredada < propia):
+                    self.salidas[hijo] = heredada
+
+    def primera_coincidencia(self, texto):
+        """Devuelve la palabra clave de menor índice presente en ``texto`` o None"""
+        transiciones = self.transiciones
+        fallos = self.fallos
+        salidas = self.salidas
+        mejor = None
+        nodo = 0
+        for caracter in texto:
+            while nodo and caracter not in transiciones[nodo]:
+                nodo = fallos[nodo]
+            nodo = transiciones[nodo].get(caracter, 0)
+            indice = salidas[nodo]
+            if indice is not None and (mejor is None or indice < mejor):
+                mejor = indice
+                if mejor == 0:
+                    break
+        return None if mejor is None else self.palabras[mejor]
+
+
+class FaqsCompiladas:
+    """Tabla de respuestas con claves normalizadas y su autómata"""
+
+    def __init__(self, fuente):
+        self.respuestas = {}
+        for palabra_clave, respuesta in fuente.items():
+            self.respuestas.setdefault(normalizar(palabra_clave), respuesta)
+        self.automata = AutomataPalabrasClave(self.respuestas)
+        self.corrector = CorrectorOrtografico(
+            palabra for clave in self.respuestas for palabra in clave.split()
+        )
+
+    def responder(self, mensaje, difuso=False):
+        """Respuesta para un mensaje ya normalizado, o None si no hay coincidencia"""
+        respuesta = self.respuestas.get(mensaje)
+        if respuesta is not None:
+            return respuesta
+        palabra_clave = self.automata.primera_coincidencia(mensaje)
+        if palabra_clave is not None:
+            return self.respuestas[palabra_clave]
+        if difuso:
+            corregido = self.corrector.corregir_texto(mensaje)
+            if corregido != mensaje:
+                return self.responder(corregido)
+        return None
+
+
+_compiladas = None
+_version = None
+_lock = threading.Lock()
+
+
+def obtener_faqs_compiladas():
+    """Tabla compartida del proceso; solo se reconstruye si cambia la fuente"""
+    global _compiladas, _version
+    if _version != faqs.version:
+        with _lock:
+            if _version != faqs.version:
+                _compiladas = FaqsCompiladas(faqs.FAQS)
+                _version = faqs.version
+    return _compiladas
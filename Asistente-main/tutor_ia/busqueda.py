@@ -0,0 +1,175 @@
+"""
+Índice invertido con puntuación BM25 para las preguntas frecuentes.
+
+Cada documento se indexa por los campos ``pregunta``, ``respuesta`` y
+``categoria``; las apariciones en la pregunta pesan más que en la respuesta.
+
+Para cada término se guarda, además de sus frecuencias, la lista de
+documentos ordenada por impacto (la parte de BM25 que depende del documento,
+con la norma de longitud ya aplicada). La búsqueda recorre esas listas en
+paralelo desde el mayor impacto y se detiene en cuanto el k-ésimo mejor
+resultado supera la puntuación máxima que podría alcanzar un documento aún
+no visto (algoritmo de umbral de Fagin). Así una consulta suele leer solo las
+primeras entradas de cada lista aunque la tabla tenga miles de filas.
+
+Las normas usan una longitud promedio de referencia que solo se recalcula
+cuando la real se desvía más de ``TOLERANCIA_PROMEDIO``; agregar o quitar un
+documento invalida únicamente las listas de sus términos.
+"""
+import heapq
+import math
+from operator import itemgetter
+
+from .normalizacion import normalizar
+
+PALABRAS_VACIAS = frozenset({
+    'a', 'al', 'con', 'como', 'de', 'del', 'el', 'en', 'es', 'la', 'las',
+    'lo', 'los', 'me', 'mi', 'para', 'por', 'que', 'se', 'si', 'su', 'un',
+    'una', 'y', 'o', 'cual', 'son',
+})
+TOLERANCIA_PROMEDIO = 0.1
+
+
+def tokenizar(texto):
+    """Divide el texto normalizado en términos indexables"""
+    return [t for t in normalizar(texto).split() if t not in PALABRAS_VACIAS]
+
+
+class IndiceInvertido:
+    PESOS = {'pregunta': 3.0, 'categoria': 2.0, 'respuesta': 1.0}
+    k1 = 1.5
+    b = 0.75
+
+    def __init__(self):
+        self.postings = {}
+        self.longitudes = {}
+        self.terminos = {}
+        self.documentos = {}
+        self.longitud_total = 0.0
+        self._promedio = None
+        self._normas = {}
+        self._impactos = {}
+
+    def __len__(self):
+        return len(self.documentos)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.documentos
+
+    def agregar(self, doc_id, pregunta, respuesta, categoria='', datos=None):
+        """Indexa un documento; si ya existía se reemplaza"""
+        if doc_id in self.documentos:
+            self.eliminar(doc_id)
+
+        frecuencias = {}
+        longitud = 0.0
+        for campo, texto in (('pregunta', pregunta), ('respuesta', respuesta), ('categoria', categoria)):
+            peso = self.PESOS[campo]
+            for termino in tokenizar(texto or ''):
+                frecuencias[termino] = frecuencias.get(termino, 0.0) + peso
+                longitud += peso
+
+        for termino, frecuencia in frecuencias.items():
+            self.postings.setdefault(termino, {})[doc_id] = frecuencia
+            self._impactos.pop(termino, None)
+
+        self.terminos[doc_id] = tuple(frecuencias)
+        self.longitudes[doc_id] = longitud
+        self.longitud_total += longitud
+        self.documentos[doc_id] = datos
+
+    def eliminar(self, doc_id):
+        """Quita un documento del índice; no hace nada si no existe"""
+        if doc_id not in self.documentos:
+            return
+        for termino in self.terminos.pop(doc_id):
+            lista = self.postings[termino]
+            del lista[doc_id]
+            if not lista:
+                del self.postings[termino]
+            self._impactos.pop(termino, None)
+        self.longitud_total -= self.longitudes.pop(doc_id)
+        self._normas.pop(doc_id, None)
+        del self.documentos[doc_id]
+
+    def _norma(self, doc_id):
+        norma = self._normas.get(doc_id)
+        if norma is None:
+            norma = self.k1 * (1 - self.b + self.b * self.longitudes[doc_id] / self._promedio)
+            self._normas[doc_id] = norma
+        return norma
+
+    def _impactos_de(self, termino):
+        entrada = self._impactos.get(termino)
+        if entrada is None:
+            k1 = self.k1
+            pesos = {
+                doc_id: frecuencia * (k1 + 1) / (frecuencia + self._norma(doc_id))
+                for doc_id, frecuencia in self.postings[termino].items()
+            }
+            orden = sorted(pesos.items(), key=itemgetter(1), reverse=True)
+            entrada = self._impactos[termino] = (orden, pesos)
+        return entrada
+
+    def preparar(self, texto):
+        """Listas de impacto de los términos de la consulta, con su idf.
+
+        Es la única parte de la búsqueda que lee el estado mutable del
+        índice; el resultado no cambia aunque después se modifique el índice,
+        así que ``puntuar`` puede correr sin tomar ningún lock.
+        """
+        total = len(self.documentos)
+        if not total:
+            return []
+
+        promedio = self.longitud_total / total
+        if self._promedio is None or abs(promedio - self._promedio) > TOLERANCIA_PROMEDIO * self._promedio:
+            self._promedio = promedio
+            self._normas = {}
+            self._impactos = {}
+
+        terminos = []
+        for termino in set(tokenizar(texto)):
+            lista = self.postings.get(termino)
+            if not lista:
+                continue
+            idf = math.log(1 + (total - len(lista) + 0.5) / (len(lista) + 0.5))
+            orden, pesos = self._impactos_de(termino)
+            terminos.append((idf, orden, pesos))
+        return terminos
+
+    @staticmethod
+    def puntuar(terminos, k=5):
+        """Devuelve hasta ``k`` pares (puntuación, doc_id) ordenados de mayor a menor"""
+        if k < 1:
+            return []
+        mejores = []
+        vistos = set()
+        posicion = 0
+        while True:
+            # Ningún documento no visto puede superar la suma de los impactos
+            # en la posición actual de cada lista
+            umbral = 0.0
+            pendientes = False
+            for idf, orden, _ in terminos:
+                if posicion >= len(orden):
+                    continue
+                pendientes = True
+                doc_id, peso = orden[posicion]
+                umbral += idf * peso
+                if doc_id in vistos:
+                    continue
+                vistos.add(doc_id)
+                puntuacion = sum(idf_t * pesos.get(doc_id, 0.0) for idf_t, _, pesos in terminos)
+                if len(mejores) < k:
+                    heapq.heappush(mejores, (puntuacion, doc_id))
+                elif puntuacion > mejores[0][0]:
+                    heapq.heapreplace(mejores, (puntuacion, doc_id))
+            if not pendientes or (len(mejores) == k and mejores[0][0] >= umbral):
+                break
+            posicion += 1
+        return sorted(mejores, reverse=True)
+
+    def buscar(self, texto, k=5):
+        """Devuelve hasta ``k`` pares (puntuación, doc_id) ordenados de mayor a menor"""
+        return self.puntuar(self.preparar(texto), k)
@@ -0,0 +1,127 @@
+"""
+Caché de respuestas del tutor en dos niveles.
+
+El primer nivel es un LRU en memoria del proceso y el segundo la caché de
+Django, compartida entre workers. La clave combina el mensaje normalizado, el
+modo difuso y la versión de las preguntas frecuentes, de modo que cualquier
+cambio en las FAQ deja obsoletas las entradas anteriores sin borrarlas.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+
+from plataforma_adaptativa.cache import aobtener_o_calcular, construir_clave, obtener_o_calcular
+
+from . import faqs, services
+
+
+class CacheRespuestas:
+    def __init__(self, tamano_maximo=1024, ttl=300):
+        self.tamano_maximo = tamano_maximo
+        self.ttl = ttl
+        self._local = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos_locales = 0
+        self.aciertos_compartidos = 0
+        self.fallos = 0
+
+    def clave(self, mensaje, difuso):
+        """Clave de caché para un mensaje ya normalizado"""
+        sello = f"{faqs.version}.{services.version_faqs()}"
+        resumen = hashlib.sha1(f"{sello}|{int(difuso)}|{mensaje}".encode()).hexdigest()
+        return construir_clave('tutor_ia', 'respuesta', resumen)
+
+    def _leer_local(self, clave):
+        with self._lock:
+            entrada = self._local.get(clave)
+            if entrada is None:
+                return None
+            expira, valor = entrada
+            if expira < time.monotonic():
+                del self._local[clave]
+                return None
+            self._local.move_to_end(clave)
+            self.aciertos_locales += 1
+            return valor
+
+    def _guardar_local(self, clave, valor):
+        with self._lock:
+            self._local[clave] = (time.monotonic() + self.ttl, valor)
+            self._local.move_to_end(clave)
+            while len(self._local) > self.tamano_maximo:
+                self._local.popitem(last=False)
+
+    def _registrar_compartido(self, clave, valor):
+        with self._lock:
+            if valor is None:
+                self.fallos += 1
+            else:
+                self.aciertos_compartidos += 1
+        if valor is not None:
+            self._guardar_local(clave, valor)
+
+    def obtener_o_calcular(self, mensaje, difuso, calcular):
+        """Devuelve la respuesta en caché o la calcula con ``calcular()`` y la guarda"""
+        clave = self.clave(mensaje, difuso)
+        valor = self._leer_local(clave)
+        if valor is not None:
+            return valor
+
+        calculado = []
+
+        def calcular_y_marcar():
+            calculado.append(True)
+            return calcular()
+
+        # El nivel compartido evita que varios workers calculen a la vez la misma respuesta
+        valor = obtener_o_calcular(clave, calcular_y_marcar, self.ttl)
+        self._registrar_compartido(clave, None if calculado else valor)
+        if calculado:
+            self._guardar_local(clave, valor)
+        return valor
+
+    async def aobtener_o_calcular(self, mensaje, difuso, calcular):
+        """Variante asíncrona; ``calcular`` es una corrutina"""
+        clave = self.clave(mensaje, difuso)
+        valor = self._leer_local(clave)
+        if valor is not None:
+            return valor
+
+        calculado = []
+
+        async def calcular_y_marcar():
+            calculado.append(True)
+            return await calcular()
+
+        valor = await aobtener_o_calcular(clave, calcular_y_marcar, self.ttl)
+        self._registrar_compartido(clave, None if calculado else valor)
+        if calculado:
+            self._guardar_local(clave, valor)
+        return valor
+
+    def limpiar(self):
+        """Vacía el nivel local y reinicia los contadores"""
+        with self._lock:
+            self._local.clear()
+            self.aciertos_locales = self.aciertos_compartidos = self.fallos = 0
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos_locales + self.aciertos_compartidos + self.fallos
+            return {
+                'aciertos_locales': self.aciertos_locales,
+                'aciertos_compartidos': self.aciertos_compartidos,
+                'fallos': self.fallos,
+                'tasa_aciertos': round((consultas - self.fallos) / consultas, 4) if consultas else 0.0,
+                'entradas_locales': len(self._local),
+                'tamano_maximo': self.tamano_maximo,
+            }
+
+
+cache_respuestas = CacheRespuestas(
+    tamano_maximo=getattr(settings, 'TUTOR_IA_CACHE_TAMANO', 1024),
+    ttl=getattr(settings, 'TUTOR_IA_CACHE_SEGUNDOS', 300),
+)
@@ -0,0 +1,49 @@
+"""
+Fuente de las preguntas frecuentes del asistente virtual.
+
+El orden de ``FAQS`` importa: cuando varias palabras clave aparecen en el
+mensaje se responde con la primera según este orden. Las claves se comparan
+normalizadas (ver ``normalizacion.py``), así que no hace falta repetirlas
+con y sin acentos.
+"""
+
+_DIAGNOSTICO = "🔍 **Sistema de Diagnóstico**\n\nEl diagnóstico evalúa tus conocimientos en Python, Django, HTML, CSS y JavaScript. Consiste en preguntas de múltiple opción que te ayudarán a identificar tu nivel actual."
+_QUE_ES_PYTHON = "🐍 **Python**\n\nPython es un lenguaje de programación interpretado de alto nivel. Su sintaxis clara lo hace perfecto para empezar en programación."
+_QUE_ES_DJANGO = "🎸 **Django**\n\nDjango es un framework web que sigue el patrón MVT (Modelo-Vista-Template). Es ideal para desarrollar aplicaciones web complejas rápidamente."
+_USO_PLATAFORMA = "🖥️ **Uso de la Plataforma**\n\n1. Realiza el diagnóstico inicial\n2. Revisa tus resultados\n3. Accede al contenido recomendado\n4. Practica con ejercicios"
+_AYUDA = "🤖 **Asistente Virtual**\n\nPuedo ayudarte con:\n• Información sobre el diagnóstico\n• Explicaciones de Python, Django\n• Conceptos de HTML, CSS, JavaScript\n• Uso de la plataforma\n\nUsa los botones de preguntas rápidas o escribe tu duda."
+
+FAQS = {
+    'diagnóstico': _DIAGNOSTICO,
+    'evaluación': _DIAGNOSTICO,
+    'test': _DIAGNOSTICO,
+
+    'python': "🐍 **Python**\n\nPython es un lenguaje de programación fácil de aprender, ideal para principiantes. Se usa para desarrollo web, análisis de datos, inteligencia artificial y más.",
+    'qué es python': _QUE_ES_PYTHON,
+
+    'django': "🎸 **Django**\n\nDjango es un framework web de Python que facilita la creación de aplicaciones web robustas y seguras. Incluye ORM, panel de administración y autenticación.",
+    'qué es django': _QUE_ES_DJANGO,
+
+    'html': "🌐 **HTML**\n\nHTML es el lenguaje estándar para crear páginas web. Define la estructura y el contenido usando etiquetas como <h1>, <p>, <div>.",
+    'css': "🎨 **CSS**\n\nCSS se usa para dar estilo a las páginas web. Controla colores, fuentes, diseños y la apariencia general del sitio.",
+    'javascript': "⚡ **JavaScript**\n\nJavaScript hace que las páginas web sean interactivas. Se ejecuta en el navegador y permite crear efectos, validar formularios y más.",
+
+    'plataforma': "🖥️ **Plataforma**\n\nNuestra plataforma ofrece diagnóstico inicial, contenido personalizado y seguimiento de progreso. Comienza con el diagnóstico para obtener recomendaciones.",
+    'cómo usar': _USO_PLATAFORMA,
+
+    'ayuda': _AYUDA,
+    'help': _AYUDA,
+}
+
+RESPUESTA_NO_RECONOCIDA = "❓ **Pregunta no reconocida**\n\nNo encuentro una respuesta para tu pregunta. Puedo ayudarte con:\n\n• **Diagnóstico del sistema**\n• **Python y Django**\n• **HTML, CSS, JavaScript**\n• **Uso de la plataforma**\n\nUsa los botones de preguntas rápidas o intenta con términos más específicos."
+
+# Se incrementa cada vez que cambia la fuente; el autómata compilado la usa
+# para saber si debe reconstruirse.
+version = 1
+
+
+def registrar_faqs(faqs):
+    """Reemplaza la fuente de preguntas frecuentes e invalida el autómata"""
+    global FAQS, version
+    FAQS = dict(faqs)
+    version += 1
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutor_ia', '0003_alter_preguntafrecuente_fecha_creacion'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mensaje',
+            name='fecha_creacion',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
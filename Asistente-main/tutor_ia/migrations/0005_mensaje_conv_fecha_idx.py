@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutor_ia', '0004_mensaje_fecha_creacion_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mensaje',
+            index=models.Index(fields=['conversacion', 'fecha_creacion', 'id'], name='mensaje_conv_fecha_idx'),
+        ),
+    ]
@@ -28,7 +28,14 @@ class Mensaje(models.Model):
     conversacion = models.ForeignKey(Conversacion, on_delete=models.CASCADE, related_name='mensajes')
     contenido = models.TextField()
     es_usuario = models.BooleanField(default=True)
-    fecha_creacion = models.DateTimeField(auto_now_add=True)
+    # Se asigna al encolar el mensaje, no al escribirlo (ver persistencia.py)
+    fecha_creacion = models.DateTimeField(default=timezone.now, editable=False)
+
+    class Meta:
+        indexes = [
+            # Paginación por cursor del historial (ver views.historial_conversacion)
+            models.Index(fields=['conversacion', 'fecha_creacion', 'id'], name='mensaje_conv_fecha_idx'),
+        ]
 
     def __str__(self):
         return f"{'Usuario' if self.es_usuario else 'IA'}: {self.contenido[:50]}..."
\ No newline at end of file
@@ -0,0 +1,39 @@
+"""
+Normalización de texto compartida por el tutor y la vista del asistente.
+
+Convierte a minúsculas, elimina acentos (descomposición NFKD), quita signos
+de puntuación y colapsa espacios, de modo que 'Diagnóstico?' y 'diagnostico'
+produzcan la misma clave. La ñ se conserva: 'año' y 'ano' son palabras
+distintas.
+"""
+import re
+import unicodedata
+from functools import lru_cache
+
+PATRON_SIMBOLOS = re.compile(r'[^\w\s]')
+PATRON_ESPACIOS = re.compile(r'\s+')
+TILDE = '\u0303'  # tilde combinante de la ñ
+# Los mensajes más largos se normalizan sin pasar por la caché, para que un
+# texto enorme no quede retenido en memoria
+LONGITUD_EN_CACHE = 200
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize('NFKD', texto.lower())
+    texto = ''.join(
+        c for i, c in enumerate(texto)
+        if not unicodedata.combining(c) or (c == TILDE and i and texto[i - 1] == 'n')
+    )
+    texto = unicodedata.normalize('NFC', texto)
+    texto = PATRON_SIMBOLOS.sub('', texto)
+    return PATRON_ESPACIOS.sub(' ', texto).strip()
+
+
+_normalizar_en_cache = lru_cache(maxsize=4096)(_normalizar)
+
+
+def normalizar(texto):
+    """Devuelve la forma canónica de ``texto`` usada como clave de búsqueda"""
+    if len(texto) > LONGITUD_EN_CACHE:
+        return _normalizar(texto)
+    return _normalizar_en_cache(texto)
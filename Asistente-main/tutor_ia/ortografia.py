@@ -0,0 +1,91 @@
+"""
+Corrección de errores de tipeo mediante un diccionario de borrados (SymSpell).
+
+Para cada palabra del vocabulario se precalculan las variantes obtenidas al
+borrar hasta ``distancia_maxima`` letras. Al corregir se generan los borrados
+de la palabra consultada y solo se compara contra las palabras que comparten
+alguna variante, así el coste por consulta no crece con el vocabulario.
+"""
+from itertools import combinations
+
+LONGITUD_MINIMA = 3
+LONGITUD_MAXIMA = 20
+
+
+def distancia_edicion(a, b, limite):
+    """Distancia Damerau-Levenshtein (transposiciones adyacentes); devuelve
+    ``limite + 1`` en cuanto se sabe que la supera"""
+    if abs(len(a) - len(b)) > limite:
+        return limite + 1
+    anterior_previa = None
+    anterior = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        actual = [i] + [0] * len(b)
+        minimo_fila = i
+        for j in range(1, len(b) + 1):
+            costo = 0 if a[i - 1] == b[j - 1] else 1
+            actual[j] = min(anterior[j] + 1, actual[j - 1] + 1, anterior[j - 1] + costo)
+            if (i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                actual[j] = min(actual[j], anterior_previa[j - 2] + 1)
+            minimo_fila = min(minimo_fila, actual[j])
+        if minimo_fila > limite:
+            return limite + 1
+        anterior_previa, anterior = anterior, actual
+    return anterior[-1]
+
+
+def _borrados(palabra, distancia):
+    variantes = {palabra}
+    for n in range(1, min(distancia, len(palabra) - 1) + 1):
+        for posiciones in combinations(range(len(palabra)), n):
+            variantes.add(''.join(c for i, c in enumerate(palabra) if i not in posiciones))
+    return variantes
+
+
+class CorrectorOrtografico:
+    def __init__(self, palabras=(), distancia_maxima=2):
+        self.distancia_maxima = distancia_maxima
+        self.frecuencias = {}
+        self.borrados = {}
+        for palabra in palabras:
+            self.agregar(palabra)
+
+    def _distancia_para(self, palabra):
+        # Las palabras cortas toleran un solo error para no confundir términos
+        return 1 if len(palabra) <= 4 else self.distancia_maxima
+
+    def agregar(self, palabra):
+        """Incorpora una palabra (ya normalizada) al vocabulario"""
+        if not (LONGITUD_MINIMA <= len(palabra) <= LONGITUD_MAXIMA):
+            return
+        if palabra in self.frecuencias:
+            self.frecuencias[palabra] += 1
+            return
+        self.frecuencias[palabra] = 1
+        for variante in _borrados(palabra, self._distancia_para(palabra)):
+            self.borrados.setdefault(variante, set()).add(palabra)
+
+    def corregir(self, palabra):
+        """Palabra del vocabulario más cercana a ``palabra``, o la misma si no hay ninguna"""
+        if palabra in self.frecuencias or not (LONGITUD_MINIMA <= len(palabra) <= LONGITUD_MAXIMA):
+            return palabra
+
+        limite = self._distancia_para(palabra)
+        candidatas = set()
+        for variante in _borrados(palabra, limite):
+            candidatas.update(self.borrados.get(variante, ()))
+
+        mejor = palabra
+        mejor_clave = None
+        for candidata in candidatas:
+            distancia = distancia_edicion(palabra, candidata, limite)
+            if distancia > min(limite, self._distancia_para(candidata)):
+                continue
+            clave = (distancia, -self.frecuencias[candidata], candidata)
+            if mejor_clave is None or clave < mejor_clave:
+                mejor, mejor_clave = candidata, clave
+        return mejor
+
+    def corregir_texto(self, texto):
+        """Corrige cada palabra de un texto normalizado"""
+        return ' '.join(self.corregir(palabra) for palabra in texto.split())
@@ -0,0 +1,201 @@
+"""
+Persistencia diferida de las conversaciones del tutor.
+
+Los mensajes se acumulan en memoria y se escriben con un único
+``bulk_create`` cuando el buffer alcanza ``TUTOR_IA_BUFFER_TAMANO`` mensajes,
+cuando pasan ``TUTOR_IA_BUFFER_SEGUNDOS`` desde el primer mensaje pendiente o
+al terminar el proceso. Como máximo se pierde esa ventana si el worker muere
+de forma abrupta.
+
+El id de conversación guardado en la sesión no se valida en cada mensaje.
+Si la conversación se eliminó (p. ej. desde el admin), el error de clave
+foránea aparece una sola vez al escribir el lote: sus mensajes pasan a una
+conversación nueva del mismo usuario y los siguientes se redirigen a ella.
+"""
+import atexit
+import logging
+import threading
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection
+from django.utils import timezone
+
+from .models import Conversacion, Mensaje
+
+logger = logging.getLogger(__name__)
+
+CLAVE_SESION = 'tutor_ia_conversacion'
+
+
+class BufferMensajes:
+    def __init__(self, tamano_maximo=50, intervalo=2.0):
+        self.tamano_maximo = tamano_maximo
+        self.intervalo = intervalo
+        self._pendientes = []
+        self._lock = threading.Lock()
+        self._temporizador = None
+        # Conversación eliminada -> la que la reemplaza en este proceso
+        self._reemplazos = {}
+
+    def __len__(self):
+        return len(self._pendientes)
+
+    def reemplazo(self, conversacion_id):
+        """Conversación a la que van los mensajes de ``conversacion_id``"""
+        with self._lock:
+            return self._reemplazos.get(conversacion_id, conversacion_id)
+
+    def agregar(self, conversacion_id, contenido, es_usuario, vaciar=True, usuario_id=None):
+        """Encola un mensaje; no toca la base de datos salvo que el buffer se llene.
+
+        Con ``vaciar=False`` solo informa si el buffer quedó lleno, para que el
+        llamador (p. ej. una vista asíncrona) lo vacíe fuera del event loop.
+        ``usuario_id`` permite recrear la conversación si ya no existe.
+        """
+        mensaje = Mensaje(
+            contenido=contenido,
+            es_usuario=es_usuario,
+            fecha_creacion=timezone.now(),
+        )
+        mensaje.usuario_id = usuario_id
+        with self._lock:
+            mensaje.conversacion_id = self._reemplazos.get(conversacion_id, conversacion_id)
+            self._pendientes.append(mensaje)
+            lleno = len(self._pendientes) >= self.tamano_maximo
+            if not lleno and self._temporizador is None and self.intervalo:
+                self._temporizador = threading.Timer(self.intervalo, self._vaciar_programado)
+                self._temporizador.daemon = True
+                self._temporizador.start()
+        if lleno and vaciar:
+            self.vaciar()
+        return lleno
+
+    def vaciar(self, conversacion_id=None):
+        """Escribe los mensajes pendientes y devuelve cuántos se guardaron.
+
+        Con ``conversacion_id`` solo escribe los de esa conversación; el resto
+        sigue esperando su lote.
+        """
+        with self._lock:
+            if conversacion_id is None:
+                lote, self._pendientes = self._pendientes, []
+            else:
+                lote = [m for m in self._pendientes if m.conversacion_id == conversacion_id]
+                if not lote:
+                    return 0
+                self._pendientes = [m for m in self._pendientes if m.conversacion_id != conversacion_id]
+            if not self._pendientes and self._temporizador is not None:
+                self._temporizador.cancel()
+                self._temporizador = None
+        return self._guardar(lote)
+
+    def _guardar(self, lote):
+        while lote:
+            try:
+                Mensaje.objects.bulk_create(lote, batch_size=500)
+                return len(lote)
+            except IntegrityError:
+                # Alguna conversación fue eliminada mientras sus mensajes
+                # esperaban; se repite por si se elimina otra antes del reintento
+                ids = {m.conversacion_id for m in lote}
+                existentes = set(Conversacion.objects.filter(id__in=ids).values_list('id', flat=True))
+                if existentes == ids:
+                    raise
+                lote = self._reasignar(lote, ids - existentes)
+        return 0
+
+    def _reasignar(self, lote, eliminadas):
+        """Pasa los mensajes de ``eliminadas`` a conversaciones nuevas de sus usuarios"""
+        usuarios = {
+            m.conversacion_id: m.usuario_id for m in lote
+            if m.conversacion_id in eliminadas and m.usuario_id is not None
+        }
+        vigentes = set(User.objects.filter(id__in=usuarios.values()).values_list('id', flat=True))
+        nuevas = {
+            eliminada: Conversacion.objects.create(usuario_id=usuario_id).id
+            for eliminada, usuario_id in usuarios.items() if usuario_id in vigentes
+        }
+        with self._lock:
+            for eliminada, nueva in list(self._reemplazos.items()):
+                if nueva in nuevas:
+                    self._reemplazos[eliminada] = nuevas[nueva]
+            self._reemplazos.update(nuevas)
+
+        for mensaje in lote:
+            mensaje.conversacion_id = nuevas.get(mensaje.conversacion_id, mensaje.conversacion_id)
+        sin_usuario = eliminadas - nuevas.keys()
+        if sin_usuario:
+            logger.warning(
+                "Se descartan %d mensajes de conversaciones eliminadas: %s",
+                sum(m.conversacion_id in sin_usuario for m in lote), sorted(sin_usuario),
+            )
+        return [m for m in lote if m.conversacion_id not in sin_usuario]
+
+    def _vaciar_programado(self):
+        try:
+            self.vaciar()
+        except Exception:
+            logger.exception("No se pudieron guardar los mensajes del tutor")
+        finally:
+            connection.close()
+
+
+buffer_mensajes = BufferMensajes(
+    tamano_maximo=getattr(settings, 'TUTOR_IA_BUFFER_TAMANO', 50),
+    intervalo=getattr(settings, 'TUTOR_IA_BUFFER_SEGUNDOS', 2.0),
+)
+atexit.register(buffer_mensajes.vaciar)
+
+
+def obtener_conversacion_id(request):
+    """Conversación activa del usuario en esta sesión, creándola si no existe"""
+    if not request.user.is_authenticated:
+        return None
+    en_sesion = request.session.get(CLAVE_SESION)
+    if en_sesion is None:
+        conversacion_id = Conversacion.objects.create(usuario=request.user).id
+    else:
+        # Sin consultas: las eliminadas se detectan al escribir el lote
+        conversacion_id = buffer_mensajes.reemplazo(en_sesion)
+    if en_sesion != conversacion_id:
+        request.session[CLAVE_SESION] = conversacion_id
+    return conversacion_id
+
+
+def registrar_intercambio(request, pregunta, respuesta):
+    """Encola la pregunta del usuario y la respuesta del tutor"""
+    conversacion_id = obtener_conversacion_id(request)
+    if conversacion_id is None:
+        return
+    usuario_id = request.user.pk
+    buffer_mensajes.agregar(conversacion_id, pregunta, es_usuario=True, usuario_id=usuario_id)
+    buffer_mensajes.agregar(conversacion_id, respuesta, es_usuario=False, usuario_id=usuario_id)
+
+
+async def aregistrar_intercambio(request, pregunta, respuesta):
+    """Variante asíncrona de registrar_intercambio()"""
+    usuario = await request.auser()
+    if not usuario.is_authenticated:
+        return
+    en_sesion = await request.session.aget(CLAVE_SESION)
+    if en_sesion is None:
+        conversacion_id = (await Conversacion.objects.acreate(usuario=usuario)).id
+    else:
+        conversacion_id = buffer_mensajes.reemplazo(en_sesion)
+    if en_sesion != conversacion_id:
+        await request.session.aset(CLAVE_SESION, conversacion_id)
+
+    buffer_mensajes.agregar(
+        conversacion_id, pregunta, es_usuario=True, vaciar=False, usuario_id=usuario.pk
+    )
+    if buffer_mensajes.agregar(
+        conversacion_id, respuesta, es_usuario=False, vaciar=False, usuario_id=usuario.pk
+    ):
+        await sync_to_async(buffer_mensajes.vaciar)()
+
+
+def vaciar_mensajes(conversacion_id=None):
+    """Fuerza la escritura de los mensajes pendientes (de una conversación o de todas)"""
+    return buffer_mensajes.vaciar(conversacion_id)
@@ -1,58 +1,362 @@
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+from plataforma_adaptativa.cache import construir_clave
+
+from .busqueda import IndiceInvertido, tokenizar
 from .models import PreguntaFrecuente
+from .normalizacion import normalizar
+from .ortografia import CorrectorOrtografico
+
+CLAVE_VERSION = construir_clave('tutor_ia', 'faq_version')
+MAX_CAMBIOS = 200
+DURACION_CAMBIOS = 60 * 60 * 24
+INTERVALO_SINCRONIZACION = 1.0
+
+logger = logging.getLogger(__name__)
+
+def preguntas_activas():
+    return PreguntaFrecuente.objects.filter(activa=True).only(
+        'id', 'pregunta', 'respuesta', 'categoria', 'activa'
+    )
+
 
 class TutorLocal:
-    def __init__(self):
-        self.respuestas = self.cargar_respuestas()
-        
+    # Claves ya normalizadas (sin acentos ni signos)
+    RESPUESTAS_BASE = {
+        "hola": "¡Hola! Soy tu tutor de desarrollo de software. ¿En qué puedo ayudarte?",
+        "adios": "¡Hasta luego! Recuerda practicar regularmente para mejorar tus habilidades.",
+        "gracias": "¡De nada! Estoy aquí para ayudarte en tu aprendizaje.",
+        "ayuda": "Puedo ayudarte con: \n• Preguntas sobre diagnóstico \n• Conceptos de programación \n• Uso de la plataforma \n• Django y Python",
+    }
+
+    def __init__(self, preguntas=None):
+        self._lock = threading.RLock()
+        self.indice = IndiceInvertido()
+        self.corrector = CorrectorOrtografico()
+        self.claves = {}
+        self.respuestas = self.cargar_respuestas(preguntas)
+
         self.sinonimos = {
-            "hi": "hola", "hello": "hola", "bye": "adiós", "thanks": "gracias",
-            "help": "ayuda", "diagnostico": "diagnóstico", "python": "qué es python",
-            "django": "qué es django", "html": "qué es html", "css": "qué es css",
-            "javascript": "qué es javascript", "js": "qué es javascript",
-        }
-    
-    def cargar_respuestas(self):
-        """Carga respuestas desde la base de datos"""
-        respuestas_base = {
-            "hola": "¡Hola! Soy tu tutor de desarrollo de software. ¿En qué puedo ayudarte?",
-            "adiós": "¡Hasta luego! Recuerda practicar regularmente para mejorar tus habilidades.",
-            "gracias": "¡De nada! Estoy aquí para ayudarte en tu aprendizaje.",
-            "ayuda": "Puedo ayudarte con: \n• Preguntas sobre diagnóstico \n• Conceptos de programación \n• Uso de la plataforma \n• Django y Python",
+            "hi": "hola", "hello": "hola", "bye": "adios", "thanks": "gracias",
+            "help": "ayuda", "python": "que es python",
+            "django": "que es django", "html": "que es html", "css": "que es css",
+            "javascript": "que es javascript", "js": "que es javascript",
         }
-        
-        try:
-            preguntas_db = PreguntaFrecuente.objects.filter(activa=True)
-            for pregunta in preguntas_db:
-                respuestas_base[pregunta.pregunta.lower()] = pregunta.respuesta
-        except:
-            pass
-            
+        for texto in list(self.sinonimos) + list(self.respuestas):
+            for palabra in texto.split():
+                self.corrector.agregar(palabra)
+
+    def cargar_respuestas(self, preguntas=None):
+        """Carga respuestas desde la base de datos (o de ``preguntas``) y construye el índice de búsqueda"""
+        respuestas_base = dict(self.RESPUESTAS_BASE)
+
+        # Un error de base de datos se propaga: un índice vacío instalado en
+        # silencio dejaría al proceso sin preguntas frecuentes
+        preguntas_db = preguntas_activas() if preguntas is None else preguntas
+        for pregunta in preguntas_db:
+            clave = normalizar(pregunta.pregunta)
+            respuestas_base[clave] = pregunta.respuesta
+            self.claves[pregunta.id] = clave
+            self.indexar(pregunta)
+
         return respuestas_base
-    
+
+    def indexar(self, pregunta):
+        """Agrega o reemplaza una PreguntaFrecuente en el índice invertido"""
+        for palabra in tokenizar(pregunta.pregunta + ' ' + pregunta.categoria):
+            self.corrector.agregar(palabra)
+        self.indice.agregar(
+            pregunta.id,
+            pregunta.pregunta,
+            pregunta.respuesta,
+            pregunta.categoria,
+            datos={
+                'id': pregunta.id,
+                'pregunta': pregunta.pregunta,
+                'respuesta': pregunta.respuesta,
+                'categoria': pregunta.categoria,
+            }
+        )
+
+    def actualizar_pregunta(self, pregunta):
+        """Aplica al índice el estado actual de una PreguntaFrecuente"""
+        if not pregunta.activa:
+            self.quitar_pregunta(pregunta.id)
+            return
+        with self._lock:
+            self.quitar_pregunta(pregunta.id)
+            clave = normalizar(pregunta.pregunta)
+            self.respuestas[clave] = pregunta.respuesta
+            self.claves[pregunta.id] = clave
+            self.indexar(pregunta)
+
+    def quitar_pregunta(self, pregunta_id):
+        """Elimina una PreguntaFrecuente del índice si estaba cargada"""
+        with self._lock:
+            clave = self.claves.pop(pregunta_id, None)
+            if clave is not None:
+                if clave in self.RESPUESTAS_BASE:
+                    self.respuestas[clave] = self.RESPUESTAS_BASE[clave]
+                else:
+                    self.respuestas.pop(clave, None)
+            self.indice.eliminar(pregunta_id)
+
     def limpiar_texto(self, texto):
         """Limpia y normaliza el texto"""
-        import re
-        texto = texto.lower().strip()
-        texto = re.sub(r'[^\w\sáéíóúñ]', '', texto)  
-        texto = re.sub(r'\s+', ' ', texto)
-        return texto
-    
-    def encontrar_respuesta(self, pregunta):
-        pregunta_limpia = self.limpiar_texto(pregunta)
-        
+        return normalizar(texto)
+
+    def modo_difuso(self, difuso=None):
+        """Resuelve si se aplica la corrección de errores de tipeo"""
+        if difuso is None:
+            return getattr(settings, 'TUTOR_IA_MODO_DIFUSO', False)
+        return difuso
+
+    def corregir(self, texto):
+        """Reemplaza las palabras mal escritas por la más cercana del vocabulario"""
+        with self._lock:
+            return self.corrector.corregir_texto(self.limpiar_texto(texto))
+
+    def buscar(self, pregunta, k=5, difuso=None):
+        """Devuelve las ``k`` preguntas frecuentes más relevantes, de mayor a menor puntuación"""
+        texto = self.limpiar_texto(pregunta)
+        if self.modo_difuso(difuso):
+            texto = self.corregir(texto)
+        # Bajo el lock solo se toman las listas de la consulta; la puntuación
+        # corre sin él para no serializar las peticiones concurrentes
+        with self._lock:
+            terminos = self.indice.preparar(texto)
+        resultados = []
+        for puntuacion, doc_id in self.indice.puntuar(terminos, k):
+            datos = self.indice.documentos.get(doc_id)
+            if datos is None:
+                # Se eliminó mientras se puntuaba
+                continue
+            datos = dict(datos)
+            datos['puntuacion'] = round(puntuacion, 4)
+            resultados.append(datos)
+        return resultados
+
+    def _respuesta_exacta(self, pregunta_limpia):
         if pregunta_limpia in self.sinonimos:
             pregunta_limpia = self.sinonimos[pregunta_limpia]
-        
-        if pregunta_limpia in self.respuestas:
-            return self.respuestas[pregunta_limpia]
-        
+
+        respuesta = self.respuestas.get(pregunta_limpia)
+        if respuesta is not None:
+            return respuesta
+
         palabras = pregunta_limpia.split()
         for palabra in palabras:
-            if palabra in self.respuestas:
-                return self.respuestas[palabra]
-        
-        for key in self.respuestas.keys():
-            if key in pregunta_limpia:
-                return self.respuestas[key]
-        
-        return "Lo siento, no tengo información sobre eso. Puedo ayudarte con: diagnóstico, Python, Django, HTML, CSS, JavaScript o el uso de la plataforma."
\ No newline at end of file
+            respuesta = self.respuestas.get(palabra)
+            if respuesta is not None:
+                return respuesta
+
+        candidatas = self.buscar(pregunta_limpia, k=1, difuso=False)
+        if candidatas:
+            return candidatas[0]['respuesta']
+        return None
+
+    def encontrar_respuesta(self, pregunta, difuso=None):
+        pregunta_limpia = self.limpiar_texto(pregunta)
+
+        respuesta = self._respuesta_exacta(pregunta_limpia)
+        if respuesta is None and self.modo_difuso(difuso):
+            corregida = self.corregir(pregunta_limpia)
+            if corregida != pregunta_limpia:
+                respuesta = self._respuesta_exacta(corregida)
+        if respuesta is not None:
+            return respuesta
+
+        return "Lo siento, no tengo información sobre eso. Puedo ayudarte con: diagnóstico, Python, Django, HTML, CSS, JavaScript o el uso de la plataforma."
+
+# Instancia compartida por todas las peticiones del proceso. Los cambios en
+# PreguntaFrecuente se aplican de forma incremental (ver signals.py) y se
+# anuncian a los demás workers mediante un contador de versión en la caché.
+_tutor = None
+_version_local = 0
+_ultima_sincronizacion = 0.0
+_lock = threading.Lock()
+
+
+def obtener_tutor():
+    """Devuelve el TutorLocal compartido del proceso"""
+    global _tutor, _version_local
+    if _tutor is None:
+        with _lock:
+            if _tutor is None:
+                _version_local = cache.get(CLAVE_VERSION, 0)
+                _tutor = TutorLocal()
+    else:
+        sincronizar()
+    return _tutor
+
+
+def version_faqs():
+    """Versión de las preguntas frecuentes que refleja el índice de este proceso"""
+    return _version_local
+
+
+def precargar_tutor():
+    """Construye el índice al arrancar el worker para que ninguna petición lo pague"""
+    try:
+        obtener_tutor()
+    except Exception:
+        logger.exception("No se pudo precargar el índice del tutor")
+    finally:
+        # Se llama desde el arranque o desde un hilo propio: la conexión no se reutiliza
+        connection.close()
+
+
+def _debe_sincronizar(forzar):
+    global _ultima_sincronizacion
+    ahora = time.monotonic()
+    if _tutor is None or (not forzar and ahora - _ultima_sincronizacion < INTERVALO_SINCRONIZACION):
+        return False
+    _ultima_sincronizacion = ahora
+    return True
+
+
+# Cada versión publica su cambio en una clave propia: quien hace incr() es el
+# único que escribe esa clave, así que dos workers nunca se pisan el registro.
+def _clave_cambio(numero):
+    return construir_clave('tutor_ia', 'faq_cambio', numero)
+
+
+def _claves_cambios(desde, version):
+    """Claves de los cambios entre dos versiones, o None si no vale la pena leerlas"""
+    if version < desde or version - desde > MAX_CAMBIOS:
+        return None
+    return {_clave_cambio(numero): numero for numero in range(desde + 1, version + 1)}
+
+
+def _ids_pendientes(claves, cambios):
+    """Ids modificados, o None si el registro no cubre el hueco"""
+    if claves is None or len(cambios) != len(claves):
+        return None
+    return set(cambios.values())
+
+
+def _leer_cambios(desde, version):
+    claves = _claves_cambios(desde, version)
+    return _ids_pendientes(claves, cache.get_many(claves) if claves else {})
+
+
+async def _aleer_cambios(desde, version):
+    claves = _claves_cambios(desde, version)
+    return _ids_pendientes(claves, await cache.aget_many(claves) if claves else {})
+
+
+def _aplicar_cambios(ids, vigentes):
+    for pk in ids:
+        if pk in vigentes:
+            _tutor.actualizar_pregunta(vigentes[pk])
+        else:
+            _tutor.quitar_pregunta(pk)
+
+
+def _instalar(desde, version, nuevo=None, ids=None, vigentes=None):
+    """Publica un índice reconstruido o aplica los cambios si nadie se adelantó"""
+    global _tutor, _version_local
+    with _lock:
+        if _version_local != desde:
+            return
+        if nuevo is not None:
+            _tutor = nuevo
+        else:
+            _aplicar_cambios(ids, vigentes)
+        _version_local = version
+
+
+def sincronizar(forzar=False):
+    """Aplica los cambios anunciados por otros workers desde la última sincronización"""
+    if not _debe_sincronizar(forzar):
+        return
+
+    desde = _version_local
+    version = cache.get(CLAVE_VERSION, 0)
+    if version == desde:
+        return
+
+    # La consulta y la reconstrucción se hacen fuera del lock; bajo el lock
+    # solo se sustituye la referencia o se parchean unas pocas preguntas.
+    ids = _leer_cambios(desde, version)
+    if ids is None:
+        # El registro de cambios no cubre el hueco: recarga completa
+        _instalar(desde, version, nuevo=TutorLocal())
+    else:
+        vigentes = {
+            p.id: p for p in PreguntaFrecuente.objects.filter(id__in=ids)
+        }
+        _instalar(desde, version, ids=ids, vigentes=vigentes)
+
+
+def _instalar_inicial(tutor, version):
+    global _tutor, _version_local
+    with _lock:
+        if _tutor is None:
+            _tutor, _version_local = tutor, version
+
+
+async def _construir_tutor():
+    """Lee las preguntas con el ORM asíncrono y construye el índice en otro hilo"""
+    preguntas = [p async for p in preguntas_activas().aiterator()]
+    return await sync_to_async(TutorLocal, thread_sensitive=False)(preguntas)
+
+
+async def aobtener_tutor():
+    """Variante asíncrona de obtener_tutor(); nunca bloquea el event loop"""
+    if _tutor is None:
+        version = await cache.aget(CLAVE_VERSION, 0)
+        tutor = await _construir_tutor()
+        await sync_to_async(_instalar_inicial, thread_sensitive=False)(tutor, version)
+    else:
+        await asincronizar()
+    return _tutor
+
+
+async def asincronizar(forzar=False):
+    """Variante asíncrona de sincronizar(); el lock se toma fuera del event loop"""
+    if not _debe_sincronizar(forzar):
+        return
+
+    desde = _version_local
+    version = await cache.aget(CLAVE_VERSION, 0)
+    if version == desde:
+        return
+
+    instalar = sync_to_async(_instalar, thread_sensitive=False)
+    ids = await _aleer_cambios(desde, version)
+    if ids is None:
+        await instalar(desde, version, nuevo=await _construir_tutor())
+    else:
+        vigentes = {
+            p.id: p async for p in PreguntaFrecuente.objects.filter(id__in=ids).aiterator()
+        }
+        await instalar(desde, version, ids=ids, vigentes=vigentes)
+
+
+def registrar_cambio(pk, pregunta=None):
+    """Parchea el índice local y publica el cambio para el resto de workers"""
+    global _version_local
+    with _lock:
+        if _tutor is not None:
+            if pregunta is not None:
+                _tutor.actualizar_pregunta(pregunta)
+            else:
+                _tutor.quitar_pregunta(pk)
+
+        cache.add(CLAVE_VERSION, 0, None)
+        try:
+            version = cache.incr(CLAVE_VERSION)
+        except ValueError:
+            return
+        cache.set(_clave_cambio(version), pk, DURACION_CAMBIOS)
+
+        if _version_local == version - 1:
+            _version_local = version
@@ -0,0 +1,17 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import PreguntaFrecuente
+from .services import registrar_cambio
+
+
+@receiver(post_save, sender=PreguntaFrecuente)
+def pregunta_guardada(sender, instance, **kwargs):
+    transaction.on_commit(lambda: registrar_cambio(instance.pk, instance))
+
+
+@receiver(post_delete, sender=PreguntaFrecuente)
+def pregunta_eliminada(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: registrar_cambio(pk))
@@ -1,3 +1,501 @@
-from django.test import TestCase
+import json
+import random
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import SynchronousOnlyOperation
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from . import faqs, normalizacion, services
+from .automata import AutomataPalabrasClave, FaqsCompiladas
+from .busqueda import IndiceInvertido, tokenizar
+from .cache_respuestas import cache_respuestas
+from .models import Conversacion, Mensaje, PreguntaFrecuente
+from .normalizacion import LONGITUD_EN_CACHE, normalizar
+from .ortografia import CorrectorOrtografico, distancia_edicion
+from .persistencia import CLAVE_SESION, buffer_mensajes, vaciar_mensajes
+from .views import TutorIAView, formatear_evento, fragmentar, leer_difuso
+
+
+@mock.patch.object(buffer_mensajes, 'intervalo', None)
+class PersistenciaConversacionTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        self.client.force_login(self.usuario)
+
+    def tearDown(self):
+        vaciar_mensajes()
+
+    def enviar(self, mensaje):
+        return self.client.post(
+            reverse('tutor_ia:enviar_mensaje'),
+            json.dumps({'mensaje': mensaje}),
+            content_type='application/json',
+        )
+
+    def test_mensajes_se_guardan_al_vaciar_el_buffer(self):
+        self.enviar('python')
+        self.enviar('css')
+        self.assertEqual(Mensaje.objects.count(), 0)
+
+        self.assertEqual(vaciar_mensajes(), 4)
+        mensajes = list(Mensaje.objects.order_by('fecha_creacion', 'id'))
+        self.assertEqual([m.es_usuario for m in mensajes], [True, False, True, False])
+        self.assertEqual(mensajes[0].contenido, 'python')
+        self.assertEqual(len({m.conversacion_id for m in mensajes}), 1)
+
+    def test_no_consulta_la_conversacion_en_cada_mensaje(self):
+        self.enviar('python')
+        sesion = self.client.session
+        with CaptureQueriesContext(connection) as consultas:
+            self.enviar('css')
+        self.assertFalse(any('tutor_ia_conversacion' in c['sql'] for c in consultas))
+        self.assertEqual(self.client.session[CLAVE_SESION], sesion[CLAVE_SESION])
+
+    def test_buffer_lleno_escribe_en_un_solo_lote(self):
+        conversacion = Conversacion.objects.create(usuario=self.usuario)
+        with mock.patch.object(buffer_mensajes, 'tamano_maximo', 2):
+            with self.assertNumQueries(1):
+                buffer_mensajes.agregar(conversacion.id, 'hola', True)
+                buffer_mensajes.agregar(conversacion.id, 'respuesta', False)
+        self.assertEqual(conversacion.mensajes.count(), 2)
+
+
+@mock.patch.object(buffer_mensajes, 'intervalo', None)
+class BufferConversacionEliminadaTests(TransactionTestCase):
+    # El error de clave foránea solo aparece al confirmar: hacen falta commits reales
+    def tearDown(self):
+        vaciar_mensajes()
+        buffer_mensajes._reemplazos.clear()
+
+    def enviar(self, mensaje):
+        return self.client.post(
+            reverse('tutor_ia:enviar_mensaje'),
+            json.dumps({'mensaje': mensaje}),
+            content_type='application/json',
+        )
+
+    def test_conversacion_eliminada_se_reemplaza(self):
+        usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        self.client.force_login(usuario)
+        self.enviar('python')
+        vaciar_mensajes()
+        Conversacion.objects.get().delete()
+
+        self.enviar('css')
+        self.assertEqual(vaciar_mensajes(), 2)
+        nueva = Conversacion.objects.get()
+        self.assertEqual(nueva.usuario, usuario)
+        self.assertEqual(nueva.mensajes.count(), 2)
+
+        # Los mensajes siguientes de la sesión ya van a la conversación nueva
+        self.enviar('html')
+        self.assertEqual(self.client.session[CLAVE_SESION], nueva.id)
+        self.assertEqual(vaciar_mensajes(), 2)
+        self.assertEqual(nueva.mensajes.count(), 4)
+
+    def test_descarta_solo_los_mensajes_huerfanos(self):
+        usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        vigente = Conversacion.objects.create(usuario=usuario)
+        eliminada = Conversacion.objects.create(usuario=usuario)
+        buffer_mensajes.agregar(vigente.id, 'hola', True)
+        buffer_mensajes.agregar(eliminada.id, 'hola', True)
+        eliminada.delete()
+
+        with self.assertLogs('tutor_ia.persistencia', 'WARNING'):
+            self.assertEqual(vaciar_mensajes(), 1)
+        self.assertEqual(Mensaje.objects.get().conversacion_id, vigente.id)
+
+    def test_recrea_la_conversacion_eliminada_de_un_usuario(self):
+        usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        eliminada_id = Conversacion.objects.create(usuario=usuario).id
+        buffer_mensajes.agregar(eliminada_id, 'hola', True, usuario_id=usuario.id)
+        Conversacion.objects.filter(id=eliminada_id).delete()
+
+        self.assertEqual(vaciar_mensajes(), 1)
+        nueva = Conversacion.objects.get(usuario=usuario)
+        self.assertEqual(buffer_mensajes.reemplazo(eliminada_id), nueva.id)
+
+        buffer_mensajes.agregar(eliminada_id, 'adiós', False, usuario_id=usuario.id)
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(vaciar_mensajes(), 1)
+        # Ya no hay error que resolver: se escribe directamente en la nueva
+        self.assertFalse(any('tutor_ia_conversacion' in c['sql'] for c in consultas))
+        self.assertEqual(nueva.mensajes.count(), 2)
+
+
+class HistorialConversacionTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        self.client.force_login(self.usuario)
+        self.conversacion = Conversacion.objects.create(usuario=self.usuario)
+        Mensaje.objects.bulk_create(
+            Mensaje(conversacion=self.conversacion, contenido=str(i)) for i in range(7)
+        )
+
+    def test_paginas_por_cursor_recorren_todo_el_historial(self):
+        url = reverse('tutor_ia:historial', args=[self.conversacion.id])
+        vistos = []
+        cursor = None
+        while True:
+            params = {'limite': 3}
+            if cursor:
+                params['cursor'] = cursor
+            datos = self.client.get(url, params).json()
+            vistos += [m['contenido'] for m in datos['mensajes']]
+            cursor = datos['siguiente']
+            if cursor is None:
+                break
+        self.assertEqual(vistos, [str(i) for i in reversed(range(7))])
+
+    @mock.patch.object(buffer_mensajes, 'intervalo', None)
+    def test_primera_pagina_solo_vacia_los_mensajes_de_la_conversacion(self):
+        otra = Conversacion.objects.create(usuario=self.usuario)
+        buffer_mensajes.agregar(self.conversacion.id, 'pendiente', True)
+        buffer_mensajes.agregar(otra.id, 'de otra', True)
+        try:
+            datos = self.client.get(reverse('tutor_ia:historial', args=[self.conversacion.id])).json()
+            self.assertEqual(datos['mensajes'][0]['contenido'], 'pendiente')
+            self.assertEqual(len(buffer_mensajes), 1)
+            self.assertFalse(otra.mensajes.exists())
+        finally:
+            vaciar_mensajes()
+
+    def test_conversacion_ajena_no_es_visible(self):
+        otro = User.objects.create_user('otro', password='clave-segura-123')
+        ajena = Conversacion.objects.create(usuario=otro)
+        respuesta = self.client.get(reverse('tutor_ia:historial', args=[ajena.id]))
+        self.assertEqual(respuesta.status_code, 404)
+
+
+@mock.patch.object(buffer_mensajes, 'intervalo', None)
+class TutorIAAsyncViewTests(TestCase):
+    def tearDown(self):
+        vaciar_mensajes()
+
+    async def test_responde_y_encola_la_conversacion(self):
+        usuario = await User.objects.acreate_user('alumno', password='clave-segura-123')
+        await self.async_client.aforce_login(usuario)
+
+        respuesta = await self.async_client.post(
+            reverse('tutor_ia:enviar_mensaje_async'),
+            json.dumps({'mensaje': '¿Qué es Django?'}),
+            content_type='application/json',
+        )
+
+        datos = respuesta.json()
+        self.assertTrue(datos['success'])
+        self.assertIn('Django', datos['respuesta'])
+        self.assertEqual(len(buffer_mensajes), 2)
+
+
+class CacheRespuestasTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_respuestas.limpiar()
+
+    def test_mensajes_equivalentes_comparten_entrada(self):
+        vista = TutorIAView()
+        primera = vista.obtener_respuesta('¿Qué es Python?')
+        segunda = vista.obtener_respuesta('que es python')
+
+        self.assertEqual(primera, segunda)
+        estadisticas = cache_respuestas.estadisticas()
+        self.assertEqual(estadisticas['fallos'], 1)
+        self.assertEqual(estadisticas['aciertos_locales'], 1)
+
+    def test_cambio_de_faqs_invalida_las_respuestas(self):
+        vista = TutorIAView()
+        vista.obtener_respuesta('python')
+        with mock.patch('tutor_ia.faqs.version', faqs.version + 1):
+            vista.obtener_respuesta('python')
+        self.assertEqual(cache_respuestas.estadisticas()['fallos'], 2)
+
+
+class LeerDifusoTests(TestCase):
+    def test_cadenas_falsas_no_activan_el_modo(self):
+        for valor in ('false', '0', 'no', ''):
+            self.assertFalse(leer_difuso(valor), valor)
+        for valor in ('true', '1', 'Sí', True):
+            self.assertTrue(leer_difuso(valor), valor)
+
+    @override_settings(TUTOR_IA_MODO_DIFUSO=True)
+    def test_sin_valor_usa_la_configuracion(self):
+        self.assertTrue(leer_difuso(None))
+        self.assertFalse(leer_difuso(False))
+
+
+@mock.patch.object(buffer_mensajes, 'intervalo', None)
+class TutorIAStreamViewTests(TestCase):
+    def setUp(self):
+        self.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        self.client.force_login(self.usuario)
+        self.url = reverse('tutor_ia:enviar_mensaje_stream')
+
+    def tearDown(self):
+        vaciar_mensajes()
+
+    def test_formato_de_los_eventos(self):
+        self.assertEqual(
+            formatear_evento('fragmento', {'texto': 'año\nnuevo'}),
+            'event: fragmento\ndata: {"texto": "año\\nnuevo"}\n\n',
+        )
+        self.assertEqual(list(fragmentar('abcde\n\nfg', tamano=2)), ['ab', 'cd', 'e', '\n\n', 'fg'])
+
+    def test_flujo_de_eventos(self):
+        respuesta = self.client.get(self.url, {'mensaje': '¿Qué es Python?'})
+        self.assertEqual(respuesta['Content-Type'], 'text/event-stream')
+        self.assertEqual(respuesta['Cache-Control'], 'no-cache')
+
+        bloques = b''.join(respuesta.streaming_content).decode().split('\n\n')
+        self.assertEqual(bloques.pop(), '')
+        eventos = [bloque.split('\n', 1) for bloque in bloques]
+        nombres = [nombre for nombre, _ in eventos]
+        self.assertEqual(nombres[0], 'event: candidatos')
+        self.assertEqual(nombres[-1], 'event: fin')
+        self.assertEqual(set(nombres[1:-1]), {'event: fragmento'})
+
+        texto = ''.join(json.loads(datos[len('data: '):])['texto'] for _, datos in eventos[1:-1])
+        self.assertEqual(texto, TutorIAView().obtener_respuesta('que es python'))
+
+    def test_cuerpo_invalido_responde_400(self):
+        for cuerpo in ({'mensaje': 5}, ['python'], {'mensaje': '   '}):
+            respuesta = self.client.post(self.url, json.dumps(cuerpo), content_type='application/json')
+            self.assertEqual(respuesta.status_code, 400, cuerpo)
+
+    def test_solo_post_guarda_el_intercambio(self):
+        b''.join(self.client.get(self.url, {'mensaje': 'python'}).streaming_content)
+        self.assertEqual(len(buffer_mensajes), 0)
+
+        respuesta = self.client.post(self.url, json.dumps({'mensaje': 'python'}), content_type='application/json')
+        b''.join(respuesta.streaming_content)
+        self.assertEqual(len(buffer_mensajes), 2)
+
+
+class SincronizacionTutorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.enterContext(mock.patch.object(services, '_tutor', None))
+        self.enterContext(mock.patch.object(services, '_version_local', 0))
+        self.tutor = services.obtener_tutor()
+        self.pregunta = PreguntaFrecuente.objects.create(
+            pregunta='¿Qué es Flask?', respuesta='Un microframework de Python', categoria='Python'
+        )
+
+    def cambio_en_otro_worker(self, pk, pregunta=None):
+        # Un worker sin índice propio solo publica el cambio
+        with mock.patch.object(services, '_tutor', None), mock.patch.object(services, '_version_local', -1):
+            services.registrar_cambio(pk, pregunta)
+
+    def test_aplica_los_cambios_de_otro_worker(self):
+        self.cambio_en_otro_worker(self.pregunta.pk, self.pregunta)
+        services.sincronizar(forzar=True)
+
+        self.assertIs(services._tutor, self.tutor)
+        self.assertEqual(self.tutor.buscar('flask', k=1)[0]['id'], self.pregunta.pk)
+        self.assertEqual(services.version_faqs(), 1)
+
+        pk = self.pregunta.pk
+        self.pregunta.delete()
+        self.cambio_en_otro_worker(pk)
+        services.sincronizar(forzar=True)
+        self.assertEqual(self.tutor.buscar('flask', k=1), [])
+
+    def test_hueco_en_el_registro_recarga_el_indice(self):
+        self.cambio_en_otro_worker(self.pregunta.pk, self.pregunta)
+        cache.delete(services._clave_cambio(1))
+        services.sincronizar(forzar=True)
+
+        self.assertIsNot(services._tutor, self.tutor)
+        self.assertEqual(services._tutor.buscar('flask', k=1)[0]['id'], self.pregunta.pk)
+
+    def test_registro_por_version(self):
+        self.cambio_en_otro_worker(self.pregunta.pk, self.pregunta)
+        self.cambio_en_otro_worker(99)
+        self.assertEqual(services._leer_cambios(0, 2), {self.pregunta.pk, 99})
+        self.assertIsNone(services._leer_cambios(0, 3))
+        self.assertIsNone(services._leer_cambios(0, services.MAX_CAMBIOS + 1))
+
+
+class NormalizacionTests(TestCase):
+    def test_quita_acentos_signos_y_espacios(self):
+        self.assertEqual(normalizar('  ¿Qué es   Diagnóstico?! '), 'que es diagnostico')
+        self.assertEqual(normalizar('PINGÜINO'), 'pinguino')
+
+    def test_conserva_la_enie(self):
+        self.assertEqual(normalizar('¿AÑO?'), 'año')
+        self.assertNotEqual(normalizar('año'), normalizar('ano'))
+
+    def test_textos_largos_no_entran_en_la_cache(self):
+        largo = 'á' * (LONGITUD_EN_CACHE + 1)
+        antes = normalizacion._normalizar_en_cache.cache_info().currsize
+        self.assertEqual(normalizar(largo), 'a' * (LONGITUD_EN_CACHE + 1))
+        self.assertEqual(normalizacion._normalizar_en_cache.cache_info().currsize, antes)
+
+
+class AutomataPalabrasClaveTests(TestCase):
+    def test_gana_la_palabra_clave_de_menor_indice(self):
+        automata = AutomataPalabrasClave(['django', 'python', 'py'])
+        self.assertEqual(automata.primera_coincidencia('uso python y django'), 'django')
+        self.assertEqual(automata.primera_coincidencia('aprendo python'), 'python')
+        self.assertEqual(automata.primera_coincidencia('happy'), 'py')
+        self.assertIsNone(automata.primera_coincidencia('java'))
+
+    def test_coincidencias_superpuestas(self):
+        # 'he' solo se alcanza por el enlace de fallo desde 'she'
+        automata = AutomataPalabrasClave(['he', 'she', 'hers'])
+        self.assertEqual(automata.primera_coincidencia('ushers'), 'he')
+        self.assertEqual(AutomataPalabrasClave(['hers', 'she']).primera_coincidencia('ushers'), 'hers')
+
+    def test_faqs_compiladas(self):
+        faqs_compiladas = FaqsCompiladas({'qué es python': 'definición', 'python': 'general', 'css': 'estilos'})
+        self.assertEqual(faqs_compiladas.responder('que es python'), 'definición')
+        self.assertEqual(faqs_compiladas.responder('tengo dudas de python'), 'general')
+        self.assertEqual(faqs_compiladas.responder('dudas de css y python'), 'general')
+        self.assertIsNone(faqs_compiladas.responder('rust'))
+
+
+class IndiceInvertidoTests(TestCase):
+    def setUp(self):
+        self.indice = IndiceInvertido()
+        self.indice.agregar(1, '¿Cómo instalo Django?', 'Usa pip install django.', 'Django')
+        self.indice.agregar(2, '¿Qué es un modelo?', 'Una clase de Django que representa una tabla.', 'Django')
+        self.indice.agregar(3, '¿Qué es CSS?', 'El lenguaje de estilos de la web.', 'Web')
+
+    def test_tokenizar_descarta_palabras_vacias(self):
+        self.assertEqual(tokenizar('¿Qué es el CSS de la web?'), ['css', 'web'])
+
+    def test_la_pregunta_pesa_mas_que_la_respuesta(self):
+        resultados = self.indice.buscar('instalar django')
+        self.assertEqual([doc_id for _, doc_id in resultados], [1, 2])
+        self.assertGreater(resultados[0][0], resultados[1][0])
+        self.assertEqual(self.indice.buscar('modelo django', k=1)[0][1], 2)
+        self.assertEqual(self.indice.buscar('python'), [])
+
+    def test_corte_anticipado_da_el_mismo_top_k_que_puntuar_todo(self):
+        aleatorio = random.Random(7)
+        palabras = ['python', 'django', 'web', 'modelo', 'vista', 'datos', 'api'] + [f'p{i}' for i in range(40)]
+        indice = IndiceInvertido()
+        for doc_id in range(300):
+            indice.agregar(
+                doc_id,
+                ' '.join(aleatorio.choices(palabras, k=5)),
+                ' '.join(aleatorio.choices(palabras, k=20)),
+            )
+
+        for consulta in ('python', 'django web', 'modelo vista datos api', 'p3 python'):
+            exhaustivo = {}
+            for idf, _, pesos in indice.preparar(consulta):
+                for doc_id, peso in pesos.items():
+                    exhaustivo[doc_id] = exhaustivo.get(doc_id, 0.0) + idf * peso
+            esperado = sorted(exhaustivo.values(), reverse=True)[:5]
+            obtenido = [puntuacion for puntuacion, _ in indice.buscar(consulta, k=5)]
+            self.assertEqual([round(p, 9) for p in obtenido], [round(p, 9) for p in esperado], consulta)
+
+    def test_reemplazar_y_eliminar(self):
+        self.indice.agregar(3, '¿Qué es Flask?', 'Un microframework.', 'Python')
+        self.assertEqual(self.indice.buscar('css'), [])
+        self.assertEqual(self.indice.buscar('flask')[0][1], 3)
+
+        self.indice.eliminar(3)
+        self.indice.eliminar(3)
+        self.assertNotIn(3, self.indice)
+        self.assertNotIn('flask', self.indice.postings)
+        self.assertEqual(len(self.indice), 2)
+
+
+class TutorLocalBusquedaTests(TestCase):
+    async def test_errores_de_base_no_dejan_un_indice_vacio(self):
+        # Dentro del event loop el ORM síncrono falla; antes se instalaba un índice vacío
+        with self.assertRaises(SynchronousOnlyOperation):
+            services.TutorLocal()
+
+    def test_busca_en_las_preguntas_frecuentes_activas(self):
+        PreguntaFrecuente.objects.create(pregunta='¿Qué es Flask?', respuesta='Un microframework', categoria='Python')
+        PreguntaFrecuente.objects.create(pregunta='¿Qué es Bottle?', respuesta='Otro microframework', activa=False)
+
+        tutor = services.TutorLocal()
+        resultados = tutor.buscar('microframework')
+        self.assertEqual([r['pregunta'] for r in resultados], ['¿Qué es Flask?'])
+        self.assertIn('puntuacion', resultados[0])
+        self.assertEqual(tutor.encontrar_respuesta('flask'), 'Un microframework')
+
+
+class CorrectorOrtograficoTests(TestCase):
+    def setUp(self):
+        self.corrector = CorrectorOrtografico(['python', 'django', 'javascript', 'css', 'html'])
+
+    def test_distancia_edicion(self):
+        self.assertEqual(distancia_edicion('python', 'pyhton', 2), 1)
+        self.assertEqual(distancia_edicion('django', 'dajngo', 2), 1)
+        self.assertEqual(distancia_edicion('css', 'javascript', 2), 3)
+
+    def test_corrige_errores_de_tipeo(self):
+        self.assertEqual(self.corrector.corregir('pyhton'), 'python')
+        self.assertEqual(self.corrector.corregir('javscript'), 'javascript')
+        self.assertEqual(self.corrector.corregir_texto('que es djnago'), 'que es django')
+
+    def test_no_fuerza_palabras_lejanas_ni_cortas(self):
+        self.assertEqual(self.corrector.corregir('ruby'), 'ruby')
+        self.assertEqual(self.corrector.corregir('xyz'), 'xyz')
+        self.assertEqual(self.corrector.corregir('es'), 'es')
+
+
+class ModoDifusoTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_respuestas.limpiar()
+
+    def enviar(self, difuso):
+        return self.client.post(
+            reverse('tutor_ia:enviar_mensaje'),
+            json.dumps({'mensaje': 'pyhton', 'difuso': difuso}),
+            content_type='application/json',
+        ).json()['respuesta']
+
+    def test_el_modo_difuso_corrige_la_consulta(self):
+        self.assertIn('Python', self.enviar(True))
+        self.assertEqual(self.enviar('false'), faqs.RESPUESTA_NO_RECONOCIDA)
+
+
+@mock.patch.object(buffer_mensajes, 'intervalo', None)
+class TutorIALoteViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_respuestas.limpiar()
+        self.usuario = User.objects.create_user('alumno', password='clave-segura-123')
+        self.client.force_login(self.usuario)
+
+    def tearDown(self):
+        vaciar_mensajes()
+
+    def enviar(self, mensajes):
+        return self.client.post(
+            reverse('tutor_ia:enviar_mensajes'),
+            json.dumps({'mensajes': mensajes}),
+            content_type='application/json',
+        ).json()
+
+    def test_responde_en_orden_y_una_vez_por_mensaje_distinto(self):
+        with mock.patch.object(TutorIAView, 'calcular_respuesta', side_effect=lambda m, d: f'r:{m}') as calcular:
+            datos = self.enviar(['¿Python?', 'css', 'python', 5, ''])
+
+        self.assertTrue(datos['success'])
+        self.assertEqual(datos['respuestas'], [
+            {'success': True, 'respuesta': 'r:python'},
+            {'success': True, 'respuesta': 'r:css'},
+            {'success': True, 'respuesta': 'r:python'},
+            {'success': False, 'error': 'Mensaje vacío'},
+            {'success': False, 'error': 'Mensaje vacío'},
+        ])
+        self.assertEqual(calcular.call_count, 2)
+        self.assertEqual(len(buffer_mensajes), 6)
+
+    @override_settings(TUTOR_IA_MAX_LOTE=2)
+    def test_limite_de_mensajes(self):
+        self.assertFalse(self.enviar(['a', 'b', 'c'])['success'])
+        self.assertFalse(self.enviar([])['success'])
@@ -6,4 +6,9 @@ app_name = 'tutor_ia'
 urlpatterns = [
     path('', views.TutorIAView.as_view(), name='chat'),
     path('enviar-mensaje/', views.TutorIAView.as_view(), name='enviar_mensaje'),
+    path('enviar-mensajes/', views.TutorIALoteView.as_view(), name='enviar_mensajes'),
+    path('stream/', views.TutorIAStreamView.as_view(), name='enviar_mensaje_stream'),
+    path('async/enviar-mensaje/', views.TutorIAAsyncView.as_view(), name='enviar_mensaje_async'),
+    path('historial/<int:conversacion_id>/', views.historial_conversacion, name='historial'),
+    path('metricas/', views.metricas_cache, name='metricas_cache'),
 ]
\ No newline at end of file
@@ -1,9 +1,34 @@
-from django.shortcuts import render
-from django.http import JsonResponse
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.decorators import login_required
+from django.db.models import Q
+from django.shortcuts import render, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views import View
 import json
 
+from . import faqs
+from .automata import obtener_faqs_compiladas
+from .normalizacion import normalizar
+from .models import Conversacion, Mensaje
+from .persistencia import aregistrar_intercambio, registrar_intercambio, vaciar_mensajes
+from .cache_respuestas import cache_respuestas
+from .services import aobtener_tutor, asincronizar, obtener_tutor, sincronizar
+
+
+def leer_difuso(valor):
+    """Interpreta el indicador ``difuso`` recibido en JSON o en la query string"""
+    if valor is None:
+        return getattr(settings, 'TUTOR_IA_MODO_DIFUSO', False)
+    if isinstance(valor, str):
+        return valor.strip().lower() in ('1', 'true', 'si', 'sí')
+    return bool(valor)
+
+
 class TutorIAView(View):
     def get(self, request):
         return render(request, 'tutor_ia/chat.html')
@@ -20,7 +45,8 @@ class TutorIAView(View):
             if not mensaje:
                 return JsonResponse({'success': False, 'error': 'Mensaje vacío'})
             
-            respuesta = self.obtener_respuesta(mensaje)
+            respuesta = self.obtener_respuesta(mensaje, difuso=leer_difuso(data.get('difuso')))
+            registrar_intercambio(request, data['mensaje'].strip(), respuesta)
             
             return JsonResponse({
                 'success': True, 
@@ -30,40 +56,255 @@ class TutorIAView(View):
         except Exception as e:
             return JsonResponse({'success': False, 'error': str(e)})
     
-    def obtener_respuesta(self, mensaje):
-        faqs = {
-            
-            'diagnóstico': "🔍 **Sistema de Diagnóstico**\n\nEl diagnóstico evalúa tus conocimientos en Python, Django, HTML, CSS y JavaScript. Consiste en preguntas de múltiple opción que te ayudarán a identificar tu nivel actual.",
-            'diagnostico': "🔍 **Sistema de Diagnóstico**\n\nEl diagnóstico evalúa tus conocimientos en Python, Django, HTML, CSS y JavaScript. Consiste en preguntas de múltiple opción que te ayudarán a identificar tu nivel actual.",
-            'evaluación': "🔍 **Sistema de Diagnóstico**\n\nEl diagnóstico evalúa tus conocimientos en Python, Django, HTML, CSS y JavaScript. Consiste en preguntas de múltiple opción que te ayudarán a identificar tu nivel actual.",
-            'test': "🔍 **Sistema de Diagnóstico**\n\nEl diagnóstico evalúa tus conocimientos en Python, Django, HTML, CSS y JavaScript. Consiste en preguntas de múltiple opción que te ayudarán a identificar tu nivel actual.",
-            
-            
-            'python': "🐍 **Python**\n\nPython es un lenguaje de programación fácil de aprender, ideal para principiantes. Se usa para desarrollo web, análisis de datos, inteligencia artificial y más.",
-            'qué es python': "🐍 **Python**\n\nPython es un lenguaje de programación interpretado de alto nivel. Su sintaxis clara lo hace perfecto para empezar en programación.",
-            'que es python': "🐍 **Python**\n\nPython es un lenguaje de programación interpretado de alto nivel. Su sintaxis clara lo hace perfecto para empezar en programación.",
-            
-            'django': "🎸 **Django**\n\nDjango es un framework web de Python que facilita la creación de aplicaciones web robustas y seguras. Incluye ORM, panel de administración y autenticación.",
-            'qué es django': "🎸 **Django**\n\nDjango es un framework web que sigue el patrón MVT (Modelo-Vista-Template). Es ideal para desarrollar aplicaciones web complejas rápidamente.",
-            'que es django': "🎸 **Django**\n\nDjango es un framework web que sigue el patrón MVT (Modelo-Vista-Template). Es ideal para desarrollar aplicaciones web complejas rápidamente.",
-            
-            'html': "🌐 **HTML**\n\nHTML es el lenguaje estándar para crear páginas web. Define la estructura y el contenido usando etiquetas como <h1>, <p>, <div>.",
-            'css': "🎨 **CSS**\n\nCSS se usa para dar estilo a las páginas web. Controla colores, fuentes, diseños y la apariencia general del sitio.",
-            'javascript': "⚡ **JavaScript**\n\nJavaScript hace que las páginas web sean interactivas. Se ejecuta en el navegador y permite crear efectos, validar formularios y más.",
-            
-            'plataforma': "🖥️ **Plataforma**\n\nNuestra plataforma ofrece diagnóstico inicial, contenido personalizado y seguimiento de progreso. Comienza con el diagnóstico para obtener recomendaciones.",
-            'cómo usar': "🖥️ **Uso de la Plataforma**\n\n1. Realiza el diagnóstico inicial\n2. Revisa tus resultados\n3. Accede al contenido recomendado\n4. Practica con ejercicios",
-            'como usar': "🖥️ **Uso de la Plataforma**\n\n1. Realiza el diagnóstico inicial\n2. Revisa tus resultados\n3. Accede al contenido recomendado\n4. Practica con ejercicios",
-            
-            'ayuda': "🤖 **Asistente Virtual**\n\nPuedo ayudarte con:\n• Información sobre el diagnóstico\n• Explicaciones de Python, Django\n• Conceptos de HTML, CSS, JavaScript\n• Uso de la plataforma\n\nUsa los botones de preguntas rápidas o escribe tu duda.",
-            'help': "🤖 **Asistente Virtual**\n\nPuedo ayudarte con:\n• Información sobre el diagnóstico\n• Explicaciones de Python, Django\n• Conceptos de HTML, CSS, JavaScript\n• Uso de la plataforma\n\nUsa los botones de preguntas rápidas o escribe tu duda.",
-        }
-        
-        if mensaje in faqs:
-            return faqs[mensaje]
-        
-        for palabra_clave, respuesta in faqs.items():
-            if palabra_clave in mensaje:
-                return respuesta
-        
-        return "❓ **Pregunta no reconocida**\n\nNo encuentro una respuesta para tu pregunta. Puedo ayudarte con:\n\n• **Diagnóstico del sistema**\n• **Python y Django**\n• **HTML, CSS, JavaScript**\n• **Uso de la plataforma**\n\nUsa los botones de preguntas rápidas o intenta con términos más específicos."
\ No newline at end of file
+    def obtener_respuesta(self, mensaje, difuso=False):
+        mensaje = normalizar(mensaje)
+        sincronizar()
+        return cache_respuestas.obtener_o_calcular(
+            mensaje, difuso, lambda: self.calcular_respuesta(mensaje, difuso)
+        )
+
+    def calcular_respuesta(self, mensaje, difuso=False):
+        respuesta = obtener_faqs_compiladas().responder(mensaje, difuso=difuso)
+        if respuesta is not None:
+            return respuesta
+
+        # Preguntas frecuentes administradas desde la base de datos
+        candidatas = obtener_tutor().buscar(mensaje, k=1, difuso=difuso)
+        if candidatas:
+            return candidatas[0]['respuesta']
+
+        return faqs.RESPUESTA_NO_RECONOCIDA
+
+
+class TutorIALoteView(TutorIAView):
+    """Responde varios mensajes en una sola petición, conservando el orden"""
+    http_method_names = ['post']
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+            mensajes = data.get('mensajes')
+
+            if not isinstance(mensajes, list) or not mensajes:
+                return JsonResponse({'success': False, 'error': 'Se esperaba una lista de mensajes'})
+
+            maximo = getattr(settings, 'TUTOR_IA_MAX_LOTE', 50)
+            if len(mensajes) > maximo:
+                return JsonResponse({'success': False, 'error': f'Máximo {maximo} mensajes por petición'})
+
+            difuso = leer_difuso(data.get('difuso'))
+
+            # Los mensajes repetidos (tras normalizar) se responden una sola vez
+            resueltas = {}
+            respuestas = []
+            for mensaje in mensajes:
+                if not isinstance(mensaje, str) or not mensaje.strip():
+                    respuestas.append({'success': False, 'error': 'Mensaje vacío'})
+                    continue
+                clave = normalizar(mensaje)
+                if clave not in resueltas:
+                    resueltas[clave] = self.obtener_respuesta(clave, difuso=difuso)
+                registrar_intercambio(request, mensaje.strip(), resueltas[clave])
+                respuestas.append({'success': True, 'respuesta': resueltas[clave]})
+
+            return JsonResponse({
+                'success': True,
+                'respuestas': respuestas
+            })
+
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+
+
+def formatear_evento(evento, datos):
+    """Serializa un evento en el formato de Server-Sent Events"""
+    return f"event: {evento}\ndata: {json.dumps(datos, ensure_ascii=False)}\n\n"
+
+
+def fragmentar(texto, tamano=200):
+    """Divide una respuesta en fragmentos por párrafo, sin superar ``tamano`` caracteres"""
+    for numero, parrafo in enumerate(texto.split('\n\n')):
+        if numero:
+            yield '\n\n'
+        for inicio in range(0, len(parrafo), tamano):
+            yield parrafo[inicio:inicio + tamano]
+
+
+class TutorIAStreamView(TutorIAView):
+    """
+    Respuesta del tutor como flujo ``text/event-stream``.
+
+    Emite primero un evento ``candidatos`` con las preguntas frecuentes mejor
+    puntuadas, luego la respuesta en eventos ``fragmento`` y por último
+    ``fin``. Acepta GET (``?mensaje=``, para EventSource) y POST con JSON.
+    Solo POST guarda el intercambio en la conversación: GET debe poder
+    repetirse sin efectos, así que las reconexiones o precargas del
+    navegador no duplican mensajes.
+    """
+
+    def get(self, request):
+        return self.responder_flujo(
+            request,
+            request.GET.get('mensaje', ''),
+            request.GET.get('difuso'),
+        )
+
+    def post(self, request):
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'JSON inválido'}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({'success': False, 'error': 'Se esperaba un objeto JSON'}, status=400)
+        return self.responder_flujo(request, data.get('mensaje', ''), data.get('difuso'))
+
+    def responder_flujo(self, request, mensaje, difuso):
+        if not isinstance(mensaje, str):
+            return JsonResponse({'success': False, 'error': 'El mensaje debe ser texto'}, status=400)
+        mensaje = mensaje.strip()
+        if not mensaje:
+            return JsonResponse({'success': False, 'error': 'Mensaje vacío'}, status=400)
+        difuso = leer_difuso(difuso)
+
+        candidatos = [
+            {'pregunta': c['pregunta'], 'categoria': c['categoria'], 'puntuacion': c['puntuacion']}
+            for c in obtener_tutor().buscar(mensaje, k=3, difuso=difuso)
+        ]
+        respuesta = self.obtener_respuesta(mensaje, difuso=difuso)
+        if request.method == 'POST':
+            registrar_intercambio(request, mensaje, respuesta)
+
+        eventos = self.generar_eventos(candidatos, respuesta)
+        if isinstance(request, ASGIRequest):
+            eventos = self._iterar_async(eventos)
+
+        response = StreamingHttpResponse(eventos, content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def generar_eventos(self, candidatos, respuesta):
+        yield formatear_evento('candidatos', candidatos)
+        for fragmento in fragmentar(respuesta):
+            yield formatear_evento('fragmento', {'texto': fragmento})
+        yield formatear_evento('fin', {})
+
+    async def _iterar_async(self, eventos):
+        # Bajo ASGI Django necesita un iterador asíncrono para no bloquear el event loop
+        for evento in eventos:
+            yield evento
+
+
+class TutorIAAsyncView(View):
+    """
+    Versión asíncrona del endpoint del chat para servir bajo ASGI.
+
+    Las respuestas salen de los índices en memoria; la única E/S (caché,
+    carga inicial del índice y conversación) usa las APIs asíncronas de
+    Django, así que una petición en espera no ocupa un hilo.
+    """
+    http_method_names = ['post']
+
+    @csrf_exempt
+    def dispatch(self, *args, **kwargs):
+        return super().dispatch(*args, **kwargs)
+
+    async def post(self, request):
+        try:
+            data = json.loads(request.body)
+            mensaje = data.get('mensaje', '').strip()
+
+            if not mensaje:
+                return JsonResponse({'success': False, 'error': 'Mensaje vacío'})
+
+            difuso = leer_difuso(data.get('difuso'))
+            respuesta = await self.obtener_respuesta(mensaje, difuso=difuso)
+            await aregistrar_intercambio(request, mensaje, respuesta)
+
+            return JsonResponse({
+                'success': True,
+                'respuesta': respuesta
+            })
+
+        except Exception as e:
+            return JsonResponse({'success': False, 'error': str(e)})
+
+    async def obtener_respuesta(self, mensaje, difuso=False):
+        mensaje = normalizar(mensaje)
+        await asincronizar()
+        return await cache_respuestas.aobtener_o_calcular(
+            mensaje, difuso, lambda: self.calcular_respuesta(mensaje, difuso)
+        )
+
+    async def calcular_respuesta(self, mensaje, difuso=False):
+        respuesta = obtener_faqs_compiladas().responder(mensaje, difuso=difuso)
+        if respuesta is not None:
+            return respuesta
+
+        tutor = await aobtener_tutor()
+        candidatas = tutor.buscar(mensaje, k=1, difuso=difuso)
+        if candidatas:
+            return candidatas[0]['respuesta']
+
+        return faqs.RESPUESTA_NO_RECONOCIDA
+
+# Fecha en UTC del cursor del historial, sin caracteres que requieran escape en la URL
+FORMATO_CURSOR = '%Y%m%dT%H%M%S%f'
+
+
+@login_required
+def historial_conversacion(request, conversacion_id):
+    """
+    Historial de una conversación, del mensaje más reciente al más antiguo.
+
+    Pagina por cursor sobre (fecha_creacion, id): ``?cursor=`` recibe el valor
+    ``siguiente`` de la página anterior, así cada página cuesta lo mismo sin
+    importar cuántos mensajes haya antes.
+    """
+    conversacion = get_object_or_404(Conversacion, id=conversacion_id, usuario=request.user)
+
+    try:
+        limite = min(max(int(request.GET.get('limite', 50)), 1), 200)
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'Límite inválido'}, status=400)
+
+    mensajes = Mensaje.objects.filter(conversacion=conversacion)
+
+    cursor = request.GET.get('cursor')
+    if cursor:
+        try:
+            fecha, _, ultimo_id = cursor.rpartition('_')
+            fecha = datetime.strptime(fecha, FORMATO_CURSOR).replace(tzinfo=dt_timezone.utc)
+            ultimo_id = int(ultimo_id)
+        except ValueError:
+            return JsonResponse({'success': False, 'error': 'Cursor inválido'}, status=400)
+        mensajes = mensajes.filter(
+            Q(fecha_creacion__lt=fecha) | Q(fecha_creacion=fecha, id__lt=ultimo_id)
+        )
+    else:
+        # La primera página debe incluir los mensajes de esta conversación que
+        # aún están en el buffer; los de las demás siguen esperando su lote
+        vaciar_mensajes(conversacion.id)
+
+    pagina = list(
+        mensajes.order_by('-fecha_creacion', '-id')
+        .values('id', 'contenido', 'es_usuario', 'fecha_creacion')[:limite + 1]
+    )
+    siguiente = None
+    if len(pagina) > limite:
+        pagina = pagina[:limite]
+        ultimo = pagina[-1]
+        fecha = ultimo['fecha_creacion'].astimezone(dt_timezone.utc)
+        siguiente = f"{fecha.strftime(FORMATO_CURSOR)}_{ultimo['id']}"
+
+    return JsonResponse({
+        'success': True,
+        'mensajes': pagina,
+        'siguiente': siguiente,
+    })
+
+
+@staff_member_required
+def metricas_cache(request):
+    """Contadores de la caché de respuestas del tutor (proceso actual)"""
+    return JsonResponse(cache_respuestas.estadisticas())
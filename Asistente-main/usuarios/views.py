@@ -3,6 +3,8 @@ from django.contrib.auth import login, authenticate
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
+from modulos.resumen import obtener_resumen
+from plataforma_adaptativa.routers import usar_replica
 from .forms import RegistroForm
 
 def home(request):
@@ -45,12 +47,13 @@ def custom_login(request):
     return render(request, 'usuarios/login.html')
 
 @login_required
+@usar_replica
 def dashboard_usuario(request):
     """Dashboard principal del usuario"""
-    # Aquí puedes agregar lógica para mostrar información del usuario
-    # como progreso del diagnóstico, módulos completados, etc.
+    # Totales de progreso precalculados (una fila por clave primaria)
     context = {
         'user': request.user,
+        'resumen': obtener_resumen(request.user),
     }
     return render(request, 'usuarios/dashboard.html', context)
 